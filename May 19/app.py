@@ -1,16 +1,40 @@
 # app.py
 import asyncio
+import atexit
+import contextvars
+import copy
+import functools
+import hashlib
+import json
+import os
+import pickle
+import queue
 import re
-from flask import Flask, request, render_template
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+from flask import Flask, Response, request, render_template, jsonify
 from selenium import webdriver
 from selenium.webdriver.edge.options import Options as EdgeOptions
 from selenium.webdriver.edge.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import WebDriverException
 from webdriver_manager.microsoft import EdgeChromiumDriverManager
+import numpy as np
+import tiktoken
 import google.generativeai as genai
 from autogen import AssistantAgent, UserProxyAgent, GroupChat, GroupChatManager
+from autogen.cache.abstract_cache_base import AbstractCache
 
 app = Flask(__name__)
 
@@ -24,127 +48,1222 @@ EDGE_OPTIONS.add_argument("--headless=new")
 EDGE_OPTIONS.add_argument("--disable-gpu")
 EDGE_OPTIONS.add_argument("--no-sandbox")
 
+# Driver Pool Configuration
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2"))
+DRIVER_MAX_PAGES = int(os.getenv("DRIVER_MAX_PAGES", "50"))  # Recycle a driver after this many pages
+DRIVER_ACQUIRE_TIMEOUT = 60
+PAGE_LOAD_TIMEOUT = 20
+
+# HTTP Fast Path Configuration
+HTTP_TIMEOUT = 10
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+MAX_CONTENT_CHARS = 10000  # Longer pages are condensed with map-reduce summarization
+MIN_STATIC_TEXT = 200  # Less visible text than this usually means client-side rendering
+BROWSER_ONLY_DOMAINS = {
+    d.strip().lower() for d in os.getenv("BROWSER_ONLY_DOMAINS", "").split(",") if d.strip()
+}
+
+# Fan-out Configuration
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "8"))  # Global cap across all requests
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "30"))  # Per URL, including rate-limit wait
+HOST_RATE = float(os.getenv("HOST_RATE", "2"))  # Requests per second per host
+HOST_BURST = int(os.getenv("HOST_BURST", "4"))
+MAX_BATCH_URLS = 10
+
+# Page Cache Configuration
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", "page_cache.sqlite3")
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", "3600"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+PAGE_CACHE_MEMORY_ENTRIES = int(os.getenv("PAGE_CACHE_MEMORY_ENTRIES", "256"))
+TRACKING_PARAMS = re.compile(r"^(?:utm_\w+|fbclid|gclid|mc_cid|mc_eid)$")
+
+# Summarization Configuration
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "200000"))  # Input tokens per request
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+SUMMARIZE_PROMPT = "Summarize this concisely, focusing on key points:\n\n{text}"
+MAP_PROMPT = ("This is part {part} of {parts} of a longer document. "
+              "Summarize it concisely, keeping key facts, figures and sources:\n\n{text}")
+REDUCE_PROMPT = ("Combine these partial summaries of one document into a single concise "
+                 "summary, focusing on key points and removing repetition:\n\n{text}")
+
+# LLM Response Cache Configuration
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MEMORY_ENTRIES = 512
+LLM_CACHE_SEMANTIC = os.getenv("LLM_CACHE_SEMANTIC", "0") == "1"  # Embedding lookup for near-duplicates
+LLM_CACHE_SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", "0.97"))
+LLM_CACHE_SEED = os.getenv("LLM_CACHE_SEED", "41")  # Namespace for cached agent turns; "none" disables them
+
+# Idle research sessions kept for reuse across requests
+SESSION_POOL_SIZE = int(os.getenv("SESSION_POOL_SIZE", "16"))
+EMBEDDING_MODEL = "models/embedding-001"
+EMBEDDING_MAX_CHARS = 8000
+
 # Initialize Gemini
+GEMINI_MODEL = 'gemini-2.0-flash-001'
 genai.configure(api_key=GENAI_API_KEY)
-gemini_model = genai.GenerativeModel('gemini-2.0-flash-001')
+gemini_model = genai.GenerativeModel(GEMINI_MODEL)
+
+# One keep-alive HTTP client shared by every agent's LLM client: no per-agent
+# TLS setup, and connections to the LLM backend are reused across requests
+llm_http_client = httpx.Client(
+    timeout=120,
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=50)
+)
 
 # AutoGen Agent Configuration
 llm_config = {
     "config_list": [{
-        "model": "gemini-2.0-flash-001",
+        "model": GEMINI_MODEL,
         "api_key": GENAI_API_KEY,
         "api_type": "google",
-        "base_url": "https://generativelanguage.googleapis.com/v1beta"
+        "base_url": "https://generativelanguage.googleapis.com/v1beta",
+        "http_client": llm_http_client
     }],
+    # AutoGen's legacy DiskCache has no TTL or size bound; agent turns are cached
+    # in llm_cache instead (see TurnCache)
     "cache_seed": None
 }
 
-async def web_browser_tool(url: str):
-    """Async web browser using Selenium Edge"""
-    def sync_fetch():
+# Progress events for the streaming endpoint; the sink is set per request
+research_events = contextvars.ContextVar("research_events", default=None)
+SSE_KEEPALIVE = 15
+STREAM_MAX_CONCURRENT = int(os.getenv("STREAM_MAX_CONCURRENT", "8"))  # Research runs behind /stream
+stream_slots = threading.BoundedSemaphore(STREAM_MAX_CONCURRENT)
+
+def emit(event: str, **data):
+    """Report research progress to the current request's stream, if any"""
+    sink = research_events.get()
+    if sink is not None:
+        sink((event, data))
+
+class DriverPool:
+    """Bounded pool of warm headless Edge drivers shared by fetch threads"""
+    def __init__(self, size=DRIVER_POOL_SIZE, max_pages=DRIVER_MAX_PAGES,
+                 options=EDGE_OPTIONS, driver_path=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.options = options
+        self.driver_path = driver_path
+        self._idle = queue.LifoQueue()  # LIFO hands out the most recently used driver
+        self._pages = {}
+        self._live = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {"created": 0, "recycled": 0, "crashed": 0, "pages": 0}
+
+    def _resolve_driver_path(self):
+        # Resolve the driver binary once instead of on every fetch
+        with self._lock:
+            if self.driver_path is None:
+                self.driver_path = EdgeChromiumDriverManager().install()
+            return self.driver_path
+
+    def _create(self):
         driver = webdriver.Edge(
-            service=Service(EdgeChromiumDriverManager().install()),
-            options=EDGE_OPTIONS
+            service=Service(self._resolve_driver_path()),
+            options=self.options
         )
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        with self._lock:
+            self._pages[id(driver)] = 0
+            self.stats["created"] += 1
+        return driver
+
+    def _grow(self):
+        """Create a driver if the pool is below its size, otherwise return None"""
+        with self._lock:
+            if self._closed or self._live >= self.size:
+                return None
+            self._live += 1
+        try:
+            return self._create()
+        except Exception:
+            with self._lock:
+                self._live -= 1
+            raise
+
+    def _discard(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+            self._live -= 1
         try:
-            driver.get(url)
-            WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )  # Added missing parenthesis here
-            content = driver.find_element(By.TAG_NAME, "body").text
-            return content[:10000]  # Limit content length
-        finally:
             driver.quit()
-    
-    return await asyncio.to_thread(sync_fetch)
-async def summarize_tool(text: str):
-    """Async summarization using Gemini"""
-    response = await asyncio.to_thread(
-        lambda: gemini_model.generate_content(
-            f"Summarize this concisely, focusing on key points:\n\n{text}"
-        )
+        except Exception as e:
+            print(f"Driver quit error: {e}")
+
+    @staticmethod
+    def _healthy(driver):
+        try:
+            driver.execute_script("return 1")  # Cheap round-trip to the browser
+            return True
+        except WebDriverException:
+            return False
+
+    def start(self):
+        """Warm up the pool so requests never pay browser startup"""
+        while (driver := self._grow()) is not None:
+            self._idle.put(driver)
+
+    def _acquire(self):
+        try:
+            driver = self._idle.get_nowait()
+        except queue.Empty:
+            driver = self._grow() or self._idle.get(timeout=DRIVER_ACQUIRE_TIMEOUT)
+
+        if not self._healthy(driver):
+            with self._lock:
+                self.stats["crashed"] += 1
+            self._discard(driver)
+            driver = self._grow() or self._idle.get(timeout=DRIVER_ACQUIRE_TIMEOUT)
+        return driver
+
+    def _release(self, driver, failed):
+        with self._lock:
+            self._pages[id(driver)] = pages = self._pages.get(id(driver), 0) + 1
+            self.stats["pages"] += 1
+
+        if self._closed:
+            self._discard(driver)
+            return
+
+        crashed = failed and not self._healthy(driver)
+        if crashed or pages >= self.max_pages:
+            with self._lock:
+                self.stats["crashed" if crashed else "recycled"] += 1
+            self._discard(driver)
+            try:
+                # Replace it now so the next borrower gets a warm driver
+                driver = self._grow()
+            except Exception as e:
+                print(f"Driver replacement error: {e}")
+                return
+            if driver is None:
+                return
+        self._idle.put(driver)
+
+    @contextmanager
+    def driver(self):
+        """Borrow a driver for the duration of a with block"""
+        driver = self._acquire()
+        failed = False
+        try:
+            yield driver
+        except WebDriverException:
+            failed = True
+            raise
+        finally:
+            self._release(driver, failed)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+driver_pool = DriverPool()
+atexit.register(driver_pool.close)
+
+def read_page_text(driver, url: str):
+    """Load a page in the given driver and return its body text"""
+    driver.get(url)
+    WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
+        EC.presence_of_element_located((By.TAG_NAME, "body"))
     )
-    return response.text
+    return driver.find_element(By.TAG_NAME, "body").text
+
+# Shared keep-alive connection pool for the HTTP fast path
+http_session = requests.Session()
+http_adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=1)
+http_session.mount("http://", http_adapter)
+http_session.mount("https://", http_adapter)
+http_session.headers["User-Agent"] = "Mozilla/5.0 (compatible; ResearchAssistant/1.0)"
+
+JS_APP_MARKERS = re.compile(
+    r'<div id="(?:root|app|__next)"\s*>\s*</div>|enable javascript|window\.__NUXT__',
+    re.IGNORECASE
+)
+
+class NeedsBrowser(Exception):
+    """Raised when the HTTP fast path cannot produce usable page text"""
+
+class FetchStats:
+    """Per-tier fetch counters showing how often the fast path wins"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tiers = {
+            "http": {"count": 0, "seconds": 0.0},
+            "browser": {"count": 0, "seconds": 0.0},
+        }
+        self.fallbacks = 0
+        self.fallback_seconds = 0.0
+
+    def record(self, tier, seconds):
+        with self._lock:
+            self.tiers[tier]["count"] += 1
+            self.tiers[tier]["seconds"] += seconds
+
+    def record_fallback(self, seconds):
+        with self._lock:
+            self.fallbacks += 1
+            self.fallback_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            tiers = {name: dict(t) for name, t in self.tiers.items()}
+            fallbacks, fallback_seconds = self.fallbacks, self.fallback_seconds
+        for t in tiers.values():
+            t["avg_seconds"] = t["seconds"] / t["count"] if t["count"] else None
+
+        # Every fast-path success would otherwise have cost an average browser fetch
+        time_saved = None
+        if tiers["http"]["count"] and tiers["browser"]["count"]:
+            time_saved = (tiers["http"]["count"] * tiers["browser"]["avg_seconds"]
+                          - tiers["http"]["seconds"] - fallback_seconds)
+        attempts = tiers["http"]["count"] + fallbacks
+        return {
+            "tiers": tiers,
+            "fallbacks": fallbacks,
+            "fallback_seconds": fallback_seconds,
+            "fast_path_rate": tiers["http"]["count"] / attempts if attempts else None,
+            "estimated_seconds_saved": time_saved,
+        }
+
+fetch_stats = FetchStats()
+
+def html_to_text(html: str):
+    """Extract visible text from an HTML document"""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript", "template"]):
+        tag.decompose()
+    return soup.get_text("\n", strip=True)
+
+def needs_browser(html: str, text: str):
+    """Heuristic for pages whose content only appears after JavaScript runs"""
+    if len(text) < MIN_STATIC_TEXT:
+        return True
+    return bool(JS_APP_MARKERS.search(html)) and len(text) < 5 * MIN_STATIC_TEXT
+
+def is_browser_only(url: str):
+    host = (urlsplit(url).hostname or "").lower()
+    return any(host == d or host.endswith("." + d) for d in BROWSER_ONLY_DOMAINS)
+
+class LRUCache:
+    """Small thread-safe in-memory LRU map"""
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+def ensure_scheme(url: str):
+    """Bare "host/path" input parses as a path with no host; read it as http instead"""
+    url = url.strip()
+    parts = urlsplit(url)
+    if parts.netloc:
+        return url if parts.scheme else "http:" + url
+    return "http://" + url.lstrip("/")
+
+def normalize_url(url: str):
+    """Canonical cache key: lower-cased host, default port, sorted query, no fragment or trackers
+
+    >>> normalize_url("HTTP://Example.com:80/a?b=2&a=1&utm_source=x#top")
+    'http://example.com/a?a=1&b=2'
+    >>> normalize_url("example.com/path")
+    'http://example.com/path'
+    """
+    parts = urlsplit(ensure_scheme(url))
+    scheme = (parts.scheme or "http").lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        netloc += f":{parts.port}"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAMS.match(k)
+    ))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+class PageCache:
+    """Fetched page text: in-memory LRU in front of a content-addressed sqlite store"""
+    def __init__(self, path=PAGE_CACHE_PATH, ttl=PAGE_CACHE_TTL,
+                 max_bytes=PAGE_CACHE_MAX_BYTES, memory_entries=PAGE_CACHE_MEMORY_ENTRIES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory = LRUCache(memory_entries)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS bodies (
+                hash TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY, hash TEXT NOT NULL, etag TEXT, last_modified TEXT,
+                expires_at REAL NOT NULL, last_access REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access);
+        """)
+        self._bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM bodies").fetchone()[0]
+        self._touched = {}
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stale": 0,
+                         "revalidated": 0, "evicted": 0, "bytes_saved": 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def get(self, key: str):
+        """Return the cached entry (fresh or stale, for revalidation) or None"""
+        entry = self.memory.get(key)
+        tier = "memory_hits"
+        if entry is None:
+            tier = "disk_hits"
+            with self._lock:
+                row = self.db.execute(
+                    "SELECT b.text, b.size, p.etag, p.last_modified, p.expires_at "
+                    "FROM pages p JOIN bodies b ON b.hash = p.hash WHERE p.url = ?", (key,)
+                ).fetchone()
+            if row is None:
+                self._count("misses")
+                return None
+            entry = dict(zip(("text", "size", "etag", "last_modified", "expires_at"), row))
+            self.memory.put(key, entry)
+
+        # Access times from both tiers reach disk with the next write, so eviction
+        # ranks pages by last use without a sqlite commit on every hit
+        with self._lock:
+            self._touched[key] = time.time()
+        fresh = entry["expires_at"] > time.time()
+        if fresh:
+            self._count(tier)
+            self._count("bytes_saved", entry["size"])
+        else:
+            self._count("stale")
+        return dict(entry, fresh=fresh)
+
+    def put(self, key: str, text: str, etag=None, last_modified=None):
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        now = time.time()
+        entry = {"text": text, "size": len(data), "etag": etag,
+                 "last_modified": last_modified, "expires_at": now + self.ttl}
+        with self._lock:
+            self._flush_touches()
+            # Identical bodies under different URLs are stored once
+            if self.db.execute("INSERT OR IGNORE INTO bodies VALUES (?, ?, ?)",
+                               (digest, text, len(data))).rowcount:
+                self._bytes += len(data)
+            self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                            (key, digest, etag, last_modified, entry["expires_at"], now))
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self.db.commit()
+        self.memory.put(key, entry)
+
+    def revalidated(self, key: str, entry):
+        """Extend an entry's TTL after the origin answered 304 Not Modified"""
+        entry = dict(entry, expires_at=time.time() + self.ttl)
+        entry.pop("fresh", None)
+        with self._lock:
+            self._flush_touches()
+            self.db.execute("UPDATE pages SET expires_at = ?, last_access = ? WHERE url = ?",
+                            (entry["expires_at"], time.time(), key))
+            self.db.commit()
+        self.memory.put(key, entry)
+        self._count("revalidated")
+        self._count("bytes_saved", entry["size"])
+
+    def _flush_touches(self):
+        if self._touched:
+            self.db.executemany(
+                "UPDATE pages SET last_access = ? WHERE url = ?",
+                [(accessed, url) for url, accessed in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        # Drop least recently used pages until the body store fits the cap again
+        while self._bytes > self.max_bytes:
+            victims = [row[0] for row in self.db.execute(
+                "SELECT url FROM pages ORDER BY last_access LIMIT 32")]
+            if not victims:
+                break
+            self.db.executemany("DELETE FROM pages WHERE url = ?", [(v,) for v in victims])
+            self.db.execute("DELETE FROM bodies WHERE hash NOT IN (SELECT hash FROM pages)")
+            self._bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM bodies").fetchone()[0]
+            for victim in victims:
+                self.memory.pop(victim)
+            self.counters["evicted"] += len(victims)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["bytes"] = self._bytes
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"] + stats["stale"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else None
+        stats["memory_entries"] = len(self.memory)
+        return stats
+
+page_cache = PageCache()
+
+class ResponseCache:
+    """Gemini responses keyed on model, prompt hash and parameters, with optional near-duplicate lookup"""
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES,
+                 memory_entries=LLM_CACHE_MEMORY_ENTRIES, semantic=LLM_CACHE_SEMANTIC,
+                 similarity=LLM_CACHE_SIMILARITY):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.semantic = semantic
+        self.similarity = similarity
+        self.memory = LRUCache(memory_entries)
+        self._lock = threading.Lock()
+        # Prompts stored without a vector are embedded here, off the request path
+        self._embedder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-embed") if semantic else None
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, model TEXT NOT NULL,
+                response TEXT NOT NULL, embedding BLOB,
+                expires_at REAL NOT NULL, last_access REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+        """)
+        self.db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        self.db.commit()
+        self._entries = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+        # Unit vectors for the similarity scan, grouped by (endpoint, model)
+        self._vectors = {}
+        self._matrices = {}
+        if semantic:
+            for key, endpoint, model, blob in self.db.execute(
+                    "SELECT key, endpoint, model, embedding FROM responses WHERE embedding IS NOT NULL"):
+                self._vectors.setdefault((endpoint, model), {})[key] = np.frombuffer(blob, dtype=np.float32)
+        self.counters = {}
+
+    @staticmethod
+    def make_key(model: str, prompt: str, params=None):
+        payload = json.dumps({"model": model, "params": params or {}}, sort_keys=True)
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{payload}:{prompt_hash}".encode("utf-8")).hexdigest()
+
+    def _count(self, endpoint, name):
+        with self._lock:
+            counters = self.counters.setdefault(endpoint, {"hits": 0, "semantic_hits": 0, "misses": 0})
+            counters[name] += 1
+
+    @staticmethod
+    def embed(text: str):
+        result = genai.embed_content(model=EMBEDDING_MODEL, content=text[:EMBEDDING_MAX_CHARS])
+        vector = np.asarray(result["embedding"], dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _exact(self, key):
+        entry = self.memory.get(key)
+        if entry is None:
+            with self._lock:
+                row = self.db.execute(
+                    "SELECT response, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+                    self.db.commit()
+            if row is None:
+                return None
+            entry = row
+            self.memory.put(key, entry)
+        response, expires_at = entry
+        return response if expires_at > time.time() else None
+
+    def _has_vectors(self, endpoint, model):
+        with self._lock:
+            return bool(self._vectors.get((endpoint, model)))
+
+    def _nearest(self, endpoint, model, vector):
+        with self._lock:
+            group = self._vectors.get((endpoint, model))
+            if not group:
+                return None
+            if (endpoint, model) not in self._matrices:
+                self._matrices[(endpoint, model)] = (list(group), np.stack(list(group.values())))
+            keys, matrix = self._matrices[(endpoint, model)]
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self.similarity else None
+
+    def get(self, endpoint: str, model: str, prompt: str, params=None):
+        """Return (response or None, prompt embedding to pass back to put)"""
+        response = self._exact(self.make_key(model, prompt, params))
+        if response is not None:
+            self._count(endpoint, "hits")
+            return response, None
+
+        vector = None
+        # With nothing to compare against the miss is already certain, so the
+        # embedding round trip is left to put's background embedder
+        if self.semantic and self._has_vectors(endpoint, model):
+            try:
+                vector = self.embed(prompt)
+                match = self._nearest(endpoint, model, vector)
+                response = self._exact(match) if match else None
+            except Exception as e:
+                print(f"Semantic cache lookup error: {e}")
+            if response is not None:
+                self._count(endpoint, "semantic_hits")
+                return response, vector
+
+        self._count(endpoint, "misses")
+        return None, vector
+
+    def lookup(self, endpoint: str, key: str):
+        """Exact lookup by a caller-built key, counted under endpoint"""
+        response = self._exact(key)
+        self._count(endpoint, "hits" if response is not None else "misses")
+        return response
+
+    def put(self, endpoint: str, model: str, prompt: str, response: str, params=None, vector=None):
+        key = self.make_key(model, prompt, params)
+        self.store(endpoint, model, key, response, vector)
+        if self.semantic and vector is None:
+            self._embedder.submit(self._embed_stored, endpoint, model, key, prompt)
+
+    def _embed_stored(self, endpoint, model, key, prompt):
+        try:
+            vector = self.embed(prompt)
+        except Exception as e:
+            print(f"Semantic cache embedding error: {e}")
+            return
+        with self._lock:
+            updated = self.db.execute("UPDATE responses SET embedding = ? WHERE key = ?",
+                                      (vector.astype(np.float32).tobytes(), key)).rowcount
+            self.db.commit()
+            if updated:
+                self._vectors.setdefault((endpoint, model), {})[key] = vector
+                self._matrices.pop((endpoint, model), None)
+
+    def store(self, endpoint: str, model: str, key: str, response, vector=None):
+        now = time.time()
+        blob = vector.astype(np.float32).tobytes() if vector is not None else None
+        with self._lock:
+            existed = self.db.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (key, endpoint, model, response, blob, now + self.ttl, now))
+            if not existed:
+                self._entries += 1
+            if vector is not None:
+                self._vectors.setdefault((endpoint, model), {})[key] = vector
+                self._matrices.pop((endpoint, model), None)
+            if self._entries > self.max_entries:
+                self._evict()
+            self.db.commit()
+        self.memory.put(key, (response, now + self.ttl))
+
+    def _evict(self):
+        # Expired rows go first, then the least recently used ones
+        victims = [row[0] for row in self.db.execute(
+            "SELECT key FROM responses ORDER BY expires_at <= ? DESC, last_access LIMIT ?",
+            (time.time(), self._entries - self.max_entries + max(1, self.max_entries // 20)))]
+        self.db.executemany("DELETE FROM responses WHERE key = ?", [(v,) for v in victims])
+        self._entries -= len(victims)
+        for victim in victims:
+            self.memory.pop(victim)
+            for group_key, group in self._vectors.items():
+                if group.pop(victim, None) is not None:
+                    self._matrices.pop(group_key, None)
+
+    def stats(self):
+        with self._lock:
+            endpoints = {name: dict(c) for name, c in self.counters.items()}
+            entries = self._entries
+        for c in endpoints.values():
+            lookups = c["hits"] + c["semantic_hits"] + c["misses"]
+            c["hit_rate"] = (c["hits"] + c["semantic_hits"]) / lookups if lookups else None
+        return {"entries": entries, "semantic": self.semantic, "endpoints": endpoints}
+
+llm_cache = ResponseCache()
+
+class TurnCache(AbstractCache):
+    """AutoGen response cache for agent turns, kept in llm_cache under the
+    "agent_turn" endpoint so turns share its TTL, eviction and hit/miss counters"""
+    def __init__(self, cache, seed, endpoint="agent_turn"):
+        self.cache = cache
+        self.seed = seed
+        self.endpoint = endpoint
+
+    def _key(self, key):
+        return hashlib.sha256(f"{self.seed}:{key}".encode("utf-8")).hexdigest()
+
+    def get(self, key, default=None):
+        blob = self.cache.lookup(self.endpoint, self._key(key))
+        # A fresh object per hit: AutoGen sets attributes on the responses it returns
+        return pickle.loads(blob) if blob is not None else default
+
+    def set(self, key, value):
+        self.cache.store(self.endpoint, GEMINI_MODEL, self._key(key), pickle.dumps(value))
 
-# Initialize Agents
-researcher = AssistantAgent(
-    name="Researcher",
-    system_message="""You are a web research expert. Your tasks:
-    1. Use web_browser_tool to gather information
+    def close(self):
+        pass  # Shared by every session; AutoGen closes its cache after each call
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+if LLM_CACHE_SEED.lower() != "none":
+    llm_config["cache"] = TurnCache(llm_cache, LLM_CACHE_SEED)
+
+def http_fetch(url: str, cached=None):
+    """Fetch a page with a plain GET; returns (text, headers), text is None on 304"""
+    headers = {}
+    if cached:
+        # Conditional request lets the origin skip resending an unchanged page
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = http_session.get(url, timeout=HTTP_TIMEOUT, headers=headers)
+    if response.status_code == 304 and cached:
+        return None, response.headers
+    if response.status_code >= 400:
+        raise NeedsBrowser(f"HTTP {response.status_code}")
+
+    content_type = response.headers.get("Content-Type", "").lower()
+    if "text/plain" in content_type:
+        return response.text, response.headers
+    if "html" not in content_type:
+        raise NeedsBrowser(f"unsupported content type {content_type!r}")
+
+    text = html_to_text(response.text)
+    if needs_browser(response.text, text):
+        raise NeedsBrowser("page looks client-side rendered")
+    return text, response.headers
+
+def browser_fetch_text(url: str):
+    with driver_pool.driver() as driver:
+        return read_page_text(driver, url)
+
+def fetch_page_text(url: str):
+    """Tiered fetch: page cache, then plain HTTP, then pooled browser for JavaScript pages"""
+    url = ensure_scheme(url)
+    key = normalize_url(url)
+    cached = page_cache.get(key)
+    if cached and cached["fresh"]:
+        return cached["text"]
+
+    if not is_browser_only(url):
+        start = time.perf_counter()
+        try:
+            text, headers = http_fetch(url, cached)
+            fetch_stats.record("http", time.perf_counter() - start)
+            if text is None:
+                page_cache.revalidated(key, cached)
+                return cached["text"]
+            page_cache.put(key, text, headers.get("ETag"), headers.get("Last-Modified"))
+            return text
+        except (NeedsBrowser, requests.RequestException) as e:
+            fetch_stats.record_fallback(time.perf_counter() - start)
+            print(f"Fast path fallback for {url}: {e}")
+
+    start = time.perf_counter()
+    text = browser_fetch_text(url)
+    fetch_stats.record("browser", time.perf_counter() - start)
+    page_cache.put(key, text)
+    return text
+
+class HostRateLimiter:
+    """Per-host token bucket; callers reserve a token and sleep until it is due"""
+    def __init__(self, rate=HOST_RATE, burst=HOST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}  # host -> (tokens, last refill time)
+        self._lock = threading.Lock()
+
+    def reserve(self, host: str):
+        """Take a token for host and return the seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate) - 1
+            self._buckets[host] = (tokens, now)
+            if len(self._buckets) > 1024:
+                self._prune(now)
+        # Negative tokens are debt that is paid off at the refill rate
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+    def _prune(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        for host, (tokens, last) in list(self._buckets.items()):
+            if tokens + (now - last) * self.rate >= self.burst:
+                del self._buckets[host]
+
+host_limiter = HostRateLimiter()
+
+# Dedicated executor so the fetch concurrency cap is shared by every request
+fetch_executor = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY, thread_name_prefix="fetch")
+atexit.register(fetch_executor.shutdown, wait=False)
+
+async def fetch_with_limits(url: str):
+    delay = host_limiter.reserve((urlsplit(url).hostname or "").lower())
+    if delay:
+        await asyncio.sleep(delay)
+    emit("fetch_started", url=url)
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        content = await loop.run_in_executor(fetch_executor, fetch_page_text, url)
+    except Exception as e:
+        emit("fetch_finished", url=url, error=str(e), seconds=time.perf_counter() - start)
+        raise
+    emit("fetch_finished", url=url, chars=len(content), seconds=time.perf_counter() - start)
+    return content
+
+async def condense_page(content: str):
+    """Return short pages as-is and a map-reduce summary of long ones"""
+    if len(content) <= MAX_CONTENT_CHARS:
+        return content
+    summary = await map_reduce_summarize(content)
+    return f"[Condensed from {len(content)} characters]\n{summary}"
+
+async def web_browser_tool(url: str):
+    """Async web fetch using plain HTTP with a Selenium Edge fallback"""
+    content = await fetch_with_limits(url)
+    return await condense_page(content)
+
+async def web_browser_many(urls: list):
+    """Fetch several URLs concurrently, returning results in completion order"""
+    if isinstance(urls, str):
+        urls = re.split(r"[\s,]+", urls)
+    urls = list(dict.fromkeys(u.strip() for u in urls if u and u.strip()))[:MAX_BATCH_URLS]
+
+    async def fetch_one(url):
+        try:
+            content = await asyncio.wait_for(fetch_with_limits(url), FETCH_TIMEOUT)
+            return f"Source: {url}\n{await condense_page(content)}"
+        except asyncio.TimeoutError:
+            return f"Source: {url}\nERROR: timed out after {FETCH_TIMEOUT:g}s"
+        except Exception as e:
+            return f"Source: {url}\nERROR: {e}"
+
+    # Failed or slow URLs are reported inline so the others still come back
+    results = []
+    for next_done in asyncio.as_completed([fetch_one(url) for url in urls]):
+        results.append(await next_done)
+    return "\n\n---\n\n".join(results)
+
+# Bounded executor so parallel chunk summaries cannot flood the Gemini quota
+summary_executor = ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY, thread_name_prefix="summarize")
+atexit.register(summary_executor.shutdown, wait=False)
+summary_budget = contextvars.ContextVar("summary_budget", default=None)
+
+class TokenBudget:
+    """Summarization input tokens a single research request may spend"""
+    def __init__(self, limit=SUMMARY_TOKEN_BUDGET):
+        self.limit = limit
+        self.used = 0
+
+    def try_spend(self, tokens):
+        if self.used + tokens > self.limit:
+            return False
+        self.used += tokens
+        return True
+
+@functools.lru_cache(maxsize=1)
+def get_encoding():
+    return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: str):
+    return len(get_encoding().encode(text))
+
+def split_tokens(text: str, max_tokens=SUMMARY_CHUNK_TOKENS):
+    """Split text on token boundaries into (chunk, token_count) pairs"""
+    encoding = get_encoding()
+    tokens = encoding.encode(text)
+    return [
+        (encoding.decode(tokens[i:i + max_tokens]), len(tokens[i:i + max_tokens]))
+        for i in range(0, len(tokens), max_tokens)
+    ]
+
+def pack_summaries(summaries, max_tokens=SUMMARY_CHUNK_TOKENS):
+    """Group partial summaries so each group fits one reduce call (at least two per group)"""
+    groups, current, size = [], [], 0
+    for summary in summaries:
+        tokens = count_tokens(summary)
+        if len(current) >= 2 and size + tokens > max_tokens:
+            groups.append(current)
+            current, size = [], 0
+        current.append(summary)
+        size += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+def generate_text(prompt: str, stream: bool = False, endpoint: str = "summarize"):
+    """Cached blocking Gemini call; streamed output is also emitted as summary tokens"""
+    cached, vector = llm_cache.get(endpoint, GEMINI_MODEL, prompt)
+    if cached is not None:
+        if stream:
+            emit("summary_token", text=cached)
+        return cached
+
+    if not stream:
+        text = gemini_model.generate_content(prompt).text
+    else:
+        parts = []
+        for chunk in gemini_model.generate_content(prompt, stream=True):
+            parts.append(chunk.text)
+            emit("summary_token", text=chunk.text)
+        text = "".join(parts)
+    llm_cache.put(endpoint, GEMINI_MODEL, prompt, text, vector=vector)
+    return text
+
+async def run_llm(prompt: str, stream: bool = False, endpoint: str = "summarize"):
+    loop = asyncio.get_running_loop()
+    # Copy the context so streamed tokens still reach this request's event sink
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        summary_executor, context.run, generate_text, prompt, stream, endpoint
+    )
+
+def budget_exhausted_note(budget):
+    return f"[Not summarized: the summarization budget of {budget.limit} tokens is used up]"
+
+async def map_reduce_summarize(text: str, stream_final: bool = False):
+    """Summarize chunks in parallel, then merge the partial summaries level by level"""
+    budget = summary_budget.get() or TokenBudget()
+    chunks = split_tokens(text)
+    if len(chunks) <= 1:
+        if not budget.try_spend(chunks[0][1] if chunks else 0):
+            return budget_exhausted_note(budget)
+        return await run_llm(SUMMARIZE_PROMPT.format(text=text), stream_final)
+
+    kept = []
+    for chunk, tokens in chunks:
+        if not budget.try_spend(tokens):
+            break
+        kept.append(chunk)
+    if not kept:
+        return budget_exhausted_note(budget)
+
+    partials = await asyncio.gather(*(
+        run_llm(MAP_PROMPT.format(part=i + 1, parts=len(chunks), text=chunk), endpoint="summarize_map")
+        for i, chunk in enumerate(kept)
+    ))
+
+    # Each pass merges groups that fit one call, so depth grows with log(chunks);
+    # a lone partial is already the summary and needs no reduce call
+    streamed = merged = False
+    while len(partials) > 1:
+        groups = pack_summaries(partials)
+        final = len(groups) == 1
+        if not budget.try_spend(sum(count_tokens(p) for group in groups for p in group)):
+            break
+        partials = await asyncio.gather(*(
+            run_llm(REDUCE_PROMPT.format(text="\n\n".join(group)), stream_final and final,
+                    endpoint="summarize_reduce")
+            for group in groups
+        ))
+        streamed = stream_final and final
+    else:
+        merged = True
+
+    summary = partials[0] if merged else "\n\n".join(partials)
+    if stream_final and not streamed:
+        emit("summary_token", text=summary)
+    if not merged:
+        summary += (f"\n\n[Note: {len(partials)} partial summaries were not merged; "
+                    f"that would exceed the summarization budget of {budget.limit} tokens]")
+    if len(kept) < len(chunks):
+        summary += (f"\n\n[Note: only the first {len(kept)} of {len(chunks)} parts were summarized; "
+                    f"the rest exceeded the summarization budget of {budget.limit} tokens]")
+    return summary
+
+async def summarize_tool(text: str):
+    """Async map-reduce summarization using Gemini, streaming the final pass"""
+    return await map_reduce_summarize(text, stream_final=True)
+
+# Agent Configuration
+RESEARCHER_PROMPT = """You are a web research expert. Your tasks:
+    1. Use web_browser_tool to gather information, or web_browser_many
+       to fetch several URLs at once
     2. Extract key information with sources
     3. Return raw data in format:
        SUMMARY_START
        [Content]
-       SUMMARY_END""",
-    llm_config=llm_config,
-    human_input_mode="NEVER",
-    function_map={"web_browser_tool": web_browser_tool}
-)
+       SUMMARY_END"""
 
-summarizer = AssistantAgent(
-    name="Summarizer",
-    system_message="""You are a summarization expert. Your tasks:
+SUMMARIZER_PROMPT = """You are a summarization expert. Your tasks:
     1. Process research data
     2. Generate concise markdown summary
     3. Format output as:
        SUMMARY_START
        [Summary]
-       SUMMARY_END""",
-    llm_config=llm_config,
-    human_input_mode="NEVER",
-    function_map={"summarize_tool": summarize_tool}
-)
+       SUMMARY_END"""
 
-user_proxy = UserProxyAgent(
-    name="User_Proxy",
-    human_input_mode="NEVER",
-    max_consecutive_auto_reply=2,
-    code_execution_config=False,
-    llm_config=llm_config
-)
+MAX_ROUND = 6
+SUMMARY_PATTERN = re.compile(r'SUMMARY_START(.*?)SUMMARY_END', re.DOTALL)
 
-# Configure Group Chat
-groupchat = GroupChat(
-    agents=[user_proxy, researcher, summarizer],
-    messages=[],
-    max_round=6,
-    speaker_selection_method="round_robin"
-)
+class StreamingGroupChat(GroupChat):
+    """GroupChat that reports every message to the request's event stream"""
+    def append(self, message, speaker):
+        super().append(message, speaker)
+        if message.get("content"):
+            emit("message", name=message.get("name"), content=message["content"])
+
+class ResearchSession:
+    """One request's agents and group chat; pooled and reset between requests"""
+    def __init__(self, user_proxy, researcher, summarizer, groupchat, manager):
+        self.user_proxy = user_proxy
+        self.researcher = researcher
+        self.summarizer = summarizer
+        self.groupchat = groupchat
+        self.manager = manager
+
+    @property
+    def agents(self):
+        return [self.user_proxy, self.researcher, self.summarizer]
+
+class AgentSessionFactory:
+    """Hands out pooled research sessions, reset between requests, so agent and LLM
+    client construction happen once per session instead of once per request"""
+    def __init__(self, llm_config, max_idle=SESSION_POOL_SIZE):
+        # Private snapshot; the shared HTTP client and turn cache are kept by reference, not copied
+        self._llm_config = self._copy_config(llm_config)
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()  # Flask runs each async view in its own thread
+        self.stats = {"built": 0, "reused": 0, "build_seconds": 0.0}
+
+    @staticmethod
+    def _copy_config(config):
+        shared = [entry["http_client"] for entry in config.get("config_list", []) if "http_client" in entry]
+        if config.get("cache") is not None:
+            shared.append(config["cache"])
+        return copy.deepcopy(config, {id(obj): obj for obj in shared})
+
+    def acquire(self):
+        with self._lock:
+            session = self._idle.pop() if self._idle else None
+            if session is not None:
+                self.stats["reused"] += 1
+        if session is None:
+            start = time.perf_counter()
+            session = self.create()
+            with self._lock:
+                self.stats["built"] += 1
+                self.stats["build_seconds"] += time.perf_counter() - start
+        return session
+
+    def release(self, session, healthy=True):
+        """Reset a session's conversation state and return it to the pool"""
+        if not healthy:
+            return
+        for agent in [*session.groupchat.agents, session.manager]:
+            agent.reset()
+        session.groupchat.reset()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(session)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats, idle=len(self._idle))
+        avg = stats["build_seconds"] / stats["built"] if stats["built"] else 0.0
+        stats["avg_build_seconds"] = avg
+        stats["build_seconds_avoided"] = stats["reused"] * avg
+        return stats
+
+    def create(self):
+        """Build a new session; each gets its own config copy so none can leak state into another"""
+        llm_config = self._copy_config(self._llm_config)
+
+        researcher = AssistantAgent(
+            name="Researcher",
+            system_message=RESEARCHER_PROMPT,
+            llm_config=llm_config,
+            human_input_mode="NEVER",
+            function_map={
+                "web_browser_tool": web_browser_tool,
+                "web_browser_many": web_browser_many
+            }
+        )
+
+        summarizer = AssistantAgent(
+            name="Summarizer",
+            system_message=SUMMARIZER_PROMPT,
+            llm_config=llm_config,
+            human_input_mode="NEVER",
+            function_map={"summarize_tool": summarize_tool}
+        )
+
+        user_proxy = UserProxyAgent(
+            name="User_Proxy",
+            human_input_mode="NEVER",
+            max_consecutive_auto_reply=2,
+            code_execution_config=False,
+            llm_config=llm_config
+        )
+
+        # A fresh message list per session keeps requests apart and bounded by MAX_ROUND
+        groupchat = StreamingGroupChat(
+            agents=[user_proxy, researcher, summarizer],
+            messages=[],
+            max_round=MAX_ROUND,
+            speaker_selection_method="round_robin"
+        )
+
+        manager = GroupChatManager(groupchat=groupchat, llm_config=llm_config)
+        return ResearchSession(user_proxy, researcher, summarizer, groupchat, manager)
+
+session_factory = AgentSessionFactory(llm_config)
+
+def extract_summary(messages):
+    """Pull the first SUMMARY_START/SUMMARY_END block out of a conversation"""
+    summary = ""
+    for msg in messages:
+        if match := SUMMARY_PATTERN.search(msg.get('content') or ''):
+            summary = match.group(1).strip()
+            break
+
+    # Convert markdown to HTML-friendly format
+    if summary:
+        # Handle bullet points
+        summary = summary.replace("*   ", "• ")
+        # Remove residual markdown
+        summary = summary.replace("**", "")
 
-manager = GroupChatManager(groupchat=groupchat, llm_config=llm_config)
+    return summary or "No summary could be generated"
+
+async def run_research(query: str, session=None):
+    """Run one research conversation and return the summary.
+
+    Without a session, one is taken from the pool and returned, reset, afterwards.
+    """
+    if session is None:
+        session = session_factory.acquire()
+        healthy = False
+        try:
+            summary = await run_research(query, session)
+            healthy = True
+            return summary
+        finally:
+            session_factory.release(session, healthy)
+    summary_budget.set(TokenBudget())
+    await session.user_proxy.a_initiate_chat(
+        session.manager,
+        message=f"Research and summarize: {query}"
+    )
+    return extract_summary(session.groupchat.messages)
 
 @app.route("/", methods=["GET", "POST"])
 async def index():
     if request.method == "POST":
         query = request.form["query"]
-        
-        async def process_query():
-            await user_proxy.a_initiate_chat(
-                manager,
-                message=f"Research and summarize: {query}"
-            )
-            
-            # Extract summary from messages
-            pattern = re.compile(r'SUMMARY_START(.*?)SUMMARY_END', re.DOTALL)
-            summary = ""
-            for msg in groupchat.messages:
-                if match := pattern.search(msg.get('content', '')):
-                    summary = match.group(1).strip()
-                    break
-            
-            # Convert markdown to HTML-friendly format
-            if summary:
-                # Handle bullet points
-                summary = summary.replace("*   ", "• ")
-                # Remove residual markdown
-                summary = summary.replace("**", "")
-            
-            return summary or "No summary could be generated"
-
-        summary = await process_query()
+        summary = await run_research(query)
         return render_template("result.html", summary=summary, query=query)
     
     return render_template("index.html")
 
+def sse(event: str, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route("/stream")
+def stream():
+    """Server-Sent Events version of the research endpoint"""
+    query = request.args.get("query", "").strip()
+    if not query:
+        return jsonify({"error": "query is required"}), 400
+
+    # Each stream holds a research thread, its fetches and Gemini calls; refuse beyond the cap
+    if not stream_slots.acquire(blocking=False):
+        return (jsonify({"error": "Too many research streams in progress, try again shortly"}),
+                503, {"Retry-After": str(SSE_KEEPALIVE)})
+
+    events = queue.Queue()
+    loop = asyncio.new_event_loop()
+    stopped = threading.Event()
+    running = {}
+
+    def worker():
+        # Runs in its own thread and event loop; everything it emits lands in events
+        research_events.set(events.put)
+        asyncio.set_event_loop(loop)
+        try:
+            running["task"] = loop.create_task(run_research(query))
+            if stopped.is_set():
+                running["task"].cancel()  # stop() ran before the task existed
+            summary = loop.run_until_complete(running["task"])
+            events.put(("summary", {"summary": summary}))
+        except asyncio.CancelledError:
+            print(f"Research stream for {query!r} stopped: client disconnected")
+        except Exception as e:
+            events.put(("error", {"error": str(e)}))
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+            stream_slots.release()
+            events.put(None)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+    def stop():
+        stopped.set()
+        task = running.get("task")
+        if task is not None and not task.done():
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # The loop already finished and closed
+
+    def generate():
+        try:
+            yield sse("started", {"query": query})
+            while True:
+                try:
+                    item = events.get(timeout=SSE_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:
+                    break
+                yield sse(*item)
+        finally:
+            # The client went away or the stream finished; stop the research either way
+            stop()
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/metrics")
+def metrics():
+    return jsonify({
+        "fetch": fetch_stats.snapshot(),
+        "page_cache": page_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "driver_pool": driver_pool.stats,
+        "sessions": session_factory.snapshot()
+    })
+
 if __name__ == "__main__":
+    driver_pool.start()
     app.run(host="0.0.0.0", port=5000, use_reloader=False)
\ No newline at end of file
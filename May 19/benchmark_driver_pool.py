@@ -0,0 +1,104 @@
+# benchmark_driver_pool.py
+"""Compare cold (driver per fetch) and pooled Edge fetch latency on a local page.
+
+Usage: python benchmark_driver_pool.py [--fetches 10] [--pool-size 2] [--http]
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.webdriver.edge.service import Service
+from webdriver_manager.microsoft import EdgeChromiumDriverManager
+
+from app import EDGE_OPTIONS, DriverPool, read_page_text
+
+TEST_PAGE = """<!DOCTYPE html>
+<html><head><title>Benchmark</title></head>
+<body><h1>Driver pool benchmark</h1>{}</body></html>
+""".format("".join(f"<p>Paragraph {i} of static test content.</p>" for i in range(200)))
+
+
+def serve_directory(directory):
+    """Serve directory on a random localhost port and return the base URL"""
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def cold_fetch(url):
+    # Mirrors the old web_browser_tool: resolve, launch, fetch, quit
+    driver = webdriver.Edge(
+        service=Service(EdgeChromiumDriverManager().install()),
+        options=EDGE_OPTIONS
+    )
+    try:
+        return read_page_text(driver, url)
+    finally:
+        driver.quit()
+
+
+def pooled_fetch(pool, url):
+    with pool.driver() as driver:
+        return read_page_text(driver, url)
+
+
+async def timed_fetches(fetch, url, count, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await asyncio.to_thread(fetch, url)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    return latencies, time.perf_counter() - start
+
+
+def report(label, latencies, wall):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label:<8} mean={statistics.mean(latencies) * 1000:8.1f}ms "
+          f"p50={statistics.median(latencies) * 1000:8.1f}ms "
+          f"p95={p95 * 1000:8.1f}ms wall={wall:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fetches", type=int, default=10)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--http", action="store_true", help="serve the page over localhost instead of file://")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        page = Path(tmp) / "index.html"
+        page.write_text(TEST_PAGE, encoding="utf-8")
+        url = f"{serve_directory(tmp)}/index.html" if args.http else page.as_uri()
+        print(f"Fetching {url} {args.fetches} times, concurrency {args.pool_size}")
+
+        report("cold", *asyncio.run(timed_fetches(cold_fetch, url, args.fetches, args.pool_size)))
+
+        pool = DriverPool(size=args.pool_size)
+        start = time.perf_counter()
+        pool.start()
+        print(f"pool warm-up took {time.perf_counter() - start:.2f}s (paid once at startup)")
+        try:
+            fetch = functools.partial(pooled_fetch, pool)
+            report("pooled", *asyncio.run(timed_fetches(fetch, url, args.fetches, args.pool_size)))
+        finally:
+            pool.close()
+        print(f"pool stats: {pool.stats}")
+
+
+if __name__ == "__main__":
+    main()
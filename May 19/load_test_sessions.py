@@ -0,0 +1,83 @@
+# load_test_sessions.py
+"""Concurrent research sessions against a stubbed LLM backend.
+
+Every agent reply is replaced by a canned message after a fixed delay, so the
+numbers show how the session plumbing scales rather than how fast Gemini is.
+Sessions come from the same pool the app uses; stubs are registered once, when
+a session is built.
+
+Usage: python load_test_sessions.py [--latency 0.05] [--sessions-per-client 4]
+"""
+import argparse
+import asyncio
+import contextvars
+import time
+
+from autogen import Agent
+
+from app import AgentSessionFactory, llm_config, run_research
+
+current_query = contextvars.ContextVar("current_query")
+
+
+class StubSessionFactory(AgentSessionFactory):
+    def __init__(self, config, latency):
+        super().__init__(config)
+        self.latency = latency
+
+    def create(self):
+        session = super().create()
+        latency = self.latency
+
+        async def stub_reply(recipient, messages=None, sender=None, config=None):
+            await asyncio.sleep(latency)  # Simulated LLM round-trip
+            return True, f"SUMMARY_START\n{recipient.name} on {current_query.get()}\nSUMMARY_END"
+
+        for agent in session.agents:
+            agent.register_reply([Agent, None], stub_reply, position=0)
+        return session
+
+
+async def run_clients(factory, clients, per_client):
+    max_messages = 0
+
+    async def client(client_id):
+        nonlocal max_messages
+        for i in range(per_client):
+            query = f"query {client_id}-{i}"
+            current_query.set(query)
+            session = factory.acquire()
+            try:
+                summary = await run_research(query, session)
+                if query not in summary:
+                    raise AssertionError(f"session for {query!r} returned {summary!r}")
+                max_messages = max(max_messages, len(session.groupchat.messages))
+            finally:
+                factory.release(session)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    return time.perf_counter() - start, max_messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub LLM delay per turn in seconds")
+    parser.add_argument("--sessions-per-client", type=int, default=4)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    # The app's own config, shared HTTP client included, so construction cost is realistic
+    factory = StubSessionFactory(llm_config, args.latency)
+    baseline = None
+    for clients in args.clients:
+        elapsed, max_messages = asyncio.run(run_clients(factory, clients, args.sessions_per_client))
+        throughput = clients * args.sessions_per_client / elapsed
+        baseline = baseline or throughput
+        print(f"clients={clients:>3} sessions/s={throughput:8.2f} "
+              f"speedup={throughput / baseline:5.1f}x max_messages/session={max_messages}")
+    print(f"sessions: {factory.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
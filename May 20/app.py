@@ -1,23 +1,54 @@
 import os
+import ast
+import importlib.metadata
+import platform
+import sqlite3
 import subprocess
 import tempfile
 import asyncio
-from flask import Flask, render_template, request, jsonify
+import atexit
+import json
+import queue
+import shutil
+import sys
+import threading
+import time
+import hashlib
+import contextvars
+import functools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from quart import Quart, render_template, request, jsonify, Response
 from autogen import AssistantAgent, UserProxyAgent, GroupChat, GroupChatManager, config_list_from_models
 import google.generativeai as genai
-import nest_asyncio
-import platform
-is_windows = platform.system() == 'Windows'
 
-# Apply nest_asyncio to allow nested event loops
-nest_asyncio.apply()
-
-app = Flask(__name__)
+# ASGI app: every request runs on the server's single event loop
+# Run with: hypercorn app:app --bind 0.0.0.0:5000
+app = Quart(__name__)
 
 # Configure Gemini
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 
+# AutoGen's async replies run the synchronous OpenAI client through the loop's
+# default executor, so its size caps how many LLM calls can be in flight at once
+LLM_EXECUTOR_THREADS = int(os.getenv("LLM_EXECUTOR_THREADS", "256"))
+
+# One keep-alive HTTP client shared by every agent's LLM client: no per-agent
+# TLS setup, and connections to the LLM backend are reused across requests
+llm_http_client = httpx.Client(
+    timeout=120,
+    limits=httpx.Limits(max_connections=LLM_EXECUTOR_THREADS, max_keepalive_connections=50)
+)
+
+@app.before_serving
+async def size_default_executor():
+    # The stock default is min(32, cpu + 4) threads: 5 on a single-core host
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=LLM_EXECUTOR_THREADS, thread_name_prefix="llm")
+    )
+
 # Create proper LLM configuration for AutoGen
 llm_config = {
     "config_list": [
@@ -25,240 +56,657 @@ llm_config = {
             "model": "gemini-2.0-flash-001",
             "api_key": GEMINI_API_KEY,
             "base_url": "https://generativelanguage.googleapis.com/v1beta/models",
-            "api_type": "google"
+            "api_type": "google",
+            "http_client": llm_http_client
         }
     ],
     "temperature": 0.3,
     "timeout": 120
 }
 
+# Progress Events
+process_events = contextvars.ContextVar("process_events", default=None)
+STREAM_KEEPALIVE = 15  # Seconds of silence before the stream sends a keepalive line
+
+def emit(event: str, **data):
+    """Report progress to the current request's stream, if any; safe from any thread"""
+    sink = process_events.get()
+    if sink is not None:
+        sink((event, data))
+
+# Result Cache Configuration
+RESULT_CACHE_PATH = os.getenv(
+    "RESULT_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "result_cache.sqlite3")
+)
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_MEMORY_ENTRIES = int(os.getenv("RESULT_CACHE_MEMORY_ENTRIES", "1024"))
+
+# Snippets touching any of these can give a different answer on the next run
+NONDETERMINISTIC_MODULES = {
+    "random", "secrets", "uuid", "time", "datetime", "timeit", "os", "pathlib", "shutil",
+    "glob", "tempfile", "subprocess", "socket", "ssl", "select", "selectors", "asyncio",
+    "http", "urllib", "requests", "httpx", "aiohttp", "ftplib", "smtplib", "webbrowser",
+    "threading", "multiprocessing", "concurrent", "signal", "resource", "platform",
+    "getpass", "sqlite3", "importlib", "ctypes", "gc", "tracemalloc", "faker"
+}
+NONDETERMINISTIC_NAMES = {
+    "open", "input", "id", "hash", "exec", "eval", "compile", "__import__", "globals",
+    "locals", "vars", "breakpoint", "set", "frozenset",
+    # Attribute access into clocks, RNGs and the process environment
+    "now", "today", "utcnow", "time", "time_ns", "perf_counter", "monotonic", "random",
+    "rand", "randn", "randint", "default_rng", "urandom", "getpid", "environ", "getenv"
+}
+
+def normalize_code(code: str) -> str:
+    """Drop line-ending and trailing-whitespace noise without moving any line numbers"""
+    lines = [line.rstrip() for line in code.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    return "\n".join(lines).rstrip("\n") + "\n"
+
+def is_deterministic(code: str) -> bool:
+    """Conservative static check: no clock, randomness, network, files, env or hash order"""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return True  # The SyntaxError itself is the same every time
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules = [node.module or ""]
+        else:
+            modules = []
+        if any(module.split(".")[0] in NONDETERMINISTIC_MODULES for module in modules):
+            return False
+        if isinstance(node, ast.Name) and node.id in NONDETERMINISTIC_NAMES:
+            return False
+        if isinstance(node, ast.Attribute) and node.attr in NONDETERMINISTIC_NAMES:
+            return False
+        # String hashing is randomized per process, and -I ignores PYTHONHASHSEED
+        if isinstance(node, (ast.Set, ast.SetComp)):
+            return False
+    return True
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def environment_fingerprint() -> str:
+    """Interpreter, platform and installed-package versions the workers run against"""
+    packages = sorted(
+        f"{dist.metadata['Name']}=={dist.version}" for dist in importlib.metadata.distributions()
+    )
+    parts = [sys.version, sys.executable, platform.platform(), *packages]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """Content-addressed execute/lint results: in-memory LRU over a size-bounded sqlite store"""
+    def __init__(self, path=RESULT_CACHE_PATH, max_bytes=RESULT_CACHE_MAX_BYTES,
+                 memory_entries=RESULT_CACHE_MEMORY_ENTRIES):
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.fingerprint = environment_fingerprint()
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, kind TEXT, result TEXT, size INTEGER, last_access REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (last_access)")
+        self._db.commit()
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        self._stats = {}
+        self._evictions = 0
+        self._touched = {}
+
+    def _count(self, kind, field):
+        counters = self._stats.setdefault(
+            kind, {"hits": 0, "misses": 0, "stores": 0, "uncacheable": 0}
+        )
+        counters[field] += 1
+
+    def key(self, kind: str, code: str, context: str = "") -> str:
+        parts = [kind, self.fingerprint, context, code]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def skip(self, kind: str):
+        """Record a call that bypassed the cache because its result may vary"""
+        with self._lock:
+            self._count(kind, "uncacheable")
+
+    def get(self, kind: str, key: str, record=True):
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+            else:
+                row = self._db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+            if result is None:
+                if record:
+                    self._count(kind, "misses")
+                return None
+            # Access times reach disk with the next write, keeping hits off the sqlite journal
+            self._touched[key] = time.time()
+            if record:
+                self._count(kind, "hits")
+            return result
+
+    def _flush_touches(self):
+        if self._touched:
+            self._db.executemany(
+                "UPDATE results SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def put(self, kind: str, key: str, result: dict):
+        payload = json.dumps(result)
+        with self._lock:
+            self._remember(key, result)
+            self._flush_touches()
+            previous = self._db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, kind, result, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, payload, len(payload), time.time())
+            )
+            self._bytes += len(payload) - (previous[0] if previous else 0)
+            self._evict()
+            self._db.commit()
+            self._count(kind, "stores")
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        while self._bytes > self.max_bytes:
+            row = self._db.execute(
+                "SELECT key, size FROM results ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM results WHERE key = ?", (row[0],))
+            self._memory.pop(row[0], None)
+            self._bytes -= row[1]
+            self._evictions += 1
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            return {
+                "entries": entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "memory_entries": len(self._memory),
+                "evictions": self._evictions,
+                "by_kind": {kind: dict(counters) for kind, counters in self._stats.items()},
+            }
+
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self._db.commit()
+            self._db.close()
+
+result_cache = ResultCache()
+atexit.register(result_cache.close)
+
+# Sandbox Configuration
+SANDBOX_POOL_SIZE = int(os.getenv("SANDBOX_POOL_SIZE", "4"))
+# Runs per worker before it is replaced. Each run gets fresh globals, but imported
+# modules, cwd and environment changes carry over to the worker's next runs. At 1
+# (fresh interpreter every run) sustained throughput is bound by worker startup,
+# about the same as subprocess.run; at 20 it is ~46x that (see benchmark_executor.py).
+SANDBOX_MAX_RUNS = int(os.getenv("SANDBOX_MAX_RUNS", "20"))
+SANDBOX_TIMEOUT = 10  # Wall-clock seconds per run
+SANDBOX_ACQUIRE_TIMEOUT = float(os.getenv("SANDBOX_ACQUIRE_TIMEOUT", "30"))  # Wait for an idle worker
+SANDBOX_SPAWN_RETRY = 1.0  # First retry delay after a failed spawn; doubles up to 30s
+SANDBOX_CPU_SECONDS = int(os.getenv("SANDBOX_CPU_SECONDS", "5"))
+SANDBOX_MEMORY_MB = int(os.getenv("SANDBOX_MEMORY_MB", "512"))
+SANDBOX_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+
+class PipeWorker:
+    """A resident Python process answering one JSON line per JSON request"""
+    def __init__(self, script, args=(), cwd=None, isolated=False):
+        self.process = subprocess.Popen(
+            [sys.executable, *(["-I"] if isolated else []), script, *args],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=cwd,
+            text=True,
+            encoding="utf-8"
+        )
+        self.runs = 0
+        self.timed_out = False
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def _kill(self):
+        self.timed_out = True
+        self.process.kill()
+
+    def request(self, payload: dict, timeout: float, on_frame=None):
+        """Send one request and return the reply, or None if the worker died or timed out.
+
+        Lines carrying a "stream" key are progress frames sent ahead of the reply."""
+        self.runs += 1
+        # Killing the process on timeout unblocks readline on every platform
+        timer = threading.Timer(timeout, self._kill)
+        timer.start()
+        try:
+            self.process.stdin.write(json.dumps(payload) + "\n")
+            self.process.stdin.flush()
+            while True:
+                line = self.process.stdout.readline()
+                if not line:
+                    return None
+                reply = json.loads(line)
+                if "stream" not in reply:
+                    return reply
+                if on_frame is not None:
+                    on_frame(reply)
+        except OSError:
+            return None
+        finally:
+            timer.cancel()
+
+    def close(self):
+        if self.alive:
+            self.process.kill()
+        self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+class SandboxWorker(PipeWorker):
+    """A pre-started Python process that runs snippets in its own temp directory"""
+    def __init__(self):
+        self.workdir = tempfile.mkdtemp(prefix="sandbox_")
+        super().__init__(SANDBOX_WORKER, [str(SANDBOX_MEMORY_MB)], cwd=self.workdir, isolated=True)
+
+    def run(self, code: str, timeout: float, on_output=None) -> dict:
+        """Run a snippet; on_output(stream, text) sees stdout/stderr while it runs"""
+        payload = {"code": code, "cpu_seconds": SANDBOX_CPU_SECONDS, "stream": on_output is not None}
+        on_frame = (lambda frame: on_output(frame["stream"], frame["data"])) if on_output else None
+        result = self.request(payload, timeout, on_frame)
+        if result is not None:
+            return result
+        if self.timed_out:
+            return {"success": False, "output": "", "error": f"Execution timed out after {timeout} seconds"}
+        returncode = self.process.wait()
+        return {"success": False, "output": "",
+                "error": f"Sandbox worker exited with code {returncode} (CPU or memory limit exceeded?)"}
+
+    def close(self):
+        super().close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+class SandboxPool:
+    """Warm sandbox workers, recycled after SANDBOX_MAX_RUNS runs or a crash"""
+    def __init__(self, size=SANDBOX_POOL_SIZE, max_runs=SANDBOX_MAX_RUNS, cache=None):
+        self.size = size
+        self.max_runs = max_runs
+        self.cache = cache
+        # Results also depend on the worker script and its resource limits
+        self._cache_context = f"{file_digest(SANDBOX_WORKER)}:{SANDBOX_MEMORY_MB}:{SANDBOX_CPU_SECONDS}"
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        self._stopping = threading.Event()  # Cuts short spawn retry delays on close
+        # Runs and respawns happen off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="sandbox")
+        self._spawner = ThreadPoolExecutor(max_workers=size, thread_name_prefix="sandbox-spawn")
+        self.stats = {"runs": 0, "spawned": 0, "recycled": 0, "timeouts": 0,
+                      "spawn_failures": 0, "unavailable": 0}
+
+    def _spawn(self, delay=SANDBOX_SPAWN_RETRY):
+        # Keeps trying so a transient failure (EMFILE, ENOMEM, a full /tmp) cannot
+        # permanently shrink the pool
+        while not self._closed:
+            try:
+                worker = SandboxWorker()
+            except Exception as e:
+                with self._lock:
+                    self.stats["spawn_failures"] += 1
+                print(f"Sandbox worker failed to start, retrying in {delay:.0f}s: {e}")
+                self._stopping.wait(delay)
+                delay = min(delay * 2, 30)
+                continue
+            with self._lock:
+                self.stats["spawned"] += 1
+            if self._closed:
+                worker.close()
+            else:
+                self._idle.put(worker)
+            return
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._spawner.submit(self._spawn)
+
+    def _run_sync(self, code: str, timeout: float, key=None) -> dict:
+        on_output = None
+        if process_events.get() is not None:
+            on_output = lambda stream, data: emit("output", stream=stream, data=data)
+        try:
+            worker = self._idle.get(timeout=SANDBOX_ACQUIRE_TIMEOUT)
+        except queue.Empty:
+            with self._lock:
+                self.stats["unavailable"] += 1
+            return {"success": False, "output": "",
+                    "error": f"No sandbox worker became available within {SANDBOX_ACQUIRE_TIMEOUT:g} seconds"}
+        try:
+            result = worker.run(code, timeout, on_output)
+            # Timeouts and limit kills say more about the host than the snippet
+            if key is not None and worker.alive:
+                self.cache.put("execute", key, result)
+        finally:
+            with self._lock:
+                self.stats["runs"] += 1
+                self.stats["timeouts"] += worker.timed_out
+            if worker.alive and worker.runs < self.max_runs and not self._closed:
+                self._idle.put(worker)
+            else:
+                with self._lock:
+                    self.stats["recycled"] += 1
+                worker.close()
+                if not self._closed:
+                    self._spawner.submit(self._spawn)
+        return result
+
+    async def run(self, code: str, timeout: float = SANDBOX_TIMEOUT) -> dict:
+        key = None
+        if self.cache is not None:
+            if is_deterministic(code):
+                key = self.cache.key("execute", normalize_code(code), f"{self._cache_context}:{timeout}")
+                if (result := self.cache.get("execute", key)) is not None:
+                    for stream in ("output", "error"):
+                        if result.get(stream):
+                            emit("output", stream="stdout" if stream == "output" else "stderr",
+                                 data=result[stream], cached=True)
+                    return result
+            else:
+                self.cache.skip("execute")
+        self.start()
+        loop = asyncio.get_running_loop()
+        # Carry the request's event sink into the executor thread
+        run = functools.partial(contextvars.copy_context().run, self._run_sync, code, timeout, key)
+        return await loop.run_in_executor(self._executor, run)
+
+    def close(self):
+        self._closed = True
+        self._stopping.set()
+        self._spawner.shutdown(wait=True)
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._executor.shutdown(wait=False)
+
+sandbox_pool = SandboxPool(cache=result_cache)
+atexit.register(sandbox_pool.close)
+
+# Lint Service Configuration
+LINT_TIMEOUT = 10
+LINT_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lint_worker.py")
+
+class LintService:
+    """Resident pylint worker that lints from memory, with results cached by code hash"""
+    def __init__(self, cache=None):
+        self.cache = cache
+        self._worker = None
+        self._lock = threading.Lock()
+        # Lint output depends on the exact source text, so keys use the raw code
+        self._cache_context = file_digest(LINT_WORKER)
+        # pylint is not thread-safe, so one worker handles lints in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lint")
+        self.stats = {"lints": 0, "restarts": 0}
+
+    def _cached(self, key, record=True):
+        if self.cache is None:
+            return None
+        return self.cache.get("lint", key, record)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.alive:
+            if self._worker is not None:
+                self._worker.close()
+                self.stats["restarts"] += 1
+            self._worker = PipeWorker(LINT_WORKER)
+
+    def start(self):
+        self._executor.submit(self._ensure_worker)
+
+    def _lint_sync(self, code: str, key: str) -> dict:
+        # A duplicate may have been linted while this one waited in the queue
+        if (result := self._cached(key, record=False)) is not None:
+            return result
+
+        self._ensure_worker()
+        result = self._worker.request({"code": code}, LINT_TIMEOUT)
+        if result is None:
+            reason = "timed out" if self._worker.timed_out else "crashed"
+            self._worker.close()
+            self._worker = None
+            return {"score": 0, "messages": [], "output": "", "error": f"Linter {reason}"}
+
+        with self._lock:
+            self.stats["lints"] += 1
+        if self.cache is not None:
+            self.cache.put("lint", key, result)
+        return result
+
+    async def lint(self, code: str) -> dict:
+        key = self.cache.key("lint", code, self._cache_context) if self.cache is not None else None
+        if (result := self._cached(key)) is not None:
+            return result
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._lint_sync, code, key)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self._worker is not None:
+            self._worker.close()
+
+lint_service = LintService(cache=result_cache)
+atexit.register(lint_service.close)
+
 class CodeTools:
     @staticmethod
     async def execute_python(code: str) -> dict:
         try:
-            if is_windows:
-                # Windows-specific implementation
-                temp_dir = tempfile.mkdtemp()
-                temp_path = os.path.join(temp_dir, "temp_script.py")
-                try:
-                    with open(temp_path, 'w', encoding='utf-8') as f:
-                        f.write(code)
-                    
-                    result = subprocess.run(
-                        ["python", temp_path],
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-                    
-                    return {
-                        "success": result.returncode == 0,
-                        "output": result.stdout,
-                        "error": result.stderr
-                    }
-                finally:
-                    try:
-                        os.remove(temp_path)
-                        os.rmdir(temp_dir)
-                    except Exception as e:
-                        print(f"Windows cleanup error: {e}")
-            else:
-                # Unix/Linux/Mac implementation
-                with tempfile.NamedTemporaryFile(suffix=".py", mode='w', delete=False) as tmp:
-                    tmp.write(code)
-                    tmp_path = tmp.name
-                
-                try:
-                    result = subprocess.run(
-                        ["python", tmp_path],
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-                    return {
-                        "success": result.returncode == 0,
-                        "output": result.stdout,
-                        "error": result.stderr
-                    }
-                finally:
-                    try:
-                        os.unlink(tmp_path)
-                    except Exception as e:
-                        print(f"Unix cleanup error: {e}")
-                        
+            return await sandbox_pool.run(code)
         except Exception as e:
             return {"success": False, "error": str(e)}
 
     @staticmethod
     async def run_linter(code: str) -> dict:
         try:
-            if is_windows:
-                # Windows-specific implementation
-                temp_dir = tempfile.mkdtemp()
-                temp_path = os.path.join(temp_dir, "temp_lint.py")
-                try:
-                    with open(temp_path, 'w', encoding='utf-8') as f:
-                        f.write(code)
-                    
-                    result = subprocess.run(
-                        ["pylint", temp_path],
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-                    
-                    score = 0
-                    if "rated at" in result.stdout:
-                        score_part = result.stdout.split("rated at")[1]
-                        score = float(score_part.split("/")[0].strip())
-                    
-                    return {
-                        "score": score,
-                        "output": result.stdout,
-                        "error": result.stderr
-                    }
-                finally:
-                    try:
-                        os.remove(temp_path)
-                        os.rmdir(temp_dir)
-                    except Exception as e:
-                        print(f"Windows cleanup error: {e}")
-            else:
-                # Unix/Linux/Mac implementation
-                with tempfile.NamedTemporaryFile(suffix=".py", mode='w', delete=False) as tmp:
-                    tmp.write(code)
-                    tmp_path = tmp.name
-                
-                try:
-                    result = subprocess.run(
-                        ["pylint", tmp_path],
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-                    
-                    score = 0
-                    if "rated at" in result.stdout:
-                        score_part = result.stdout.split("rated at")[1]
-                        score = float(score_part.split("/")[0].strip())
-                    
-                    return {
-                        "score": score,
-                        "output": result.stdout,
-                        "error": result.stderr
-                    }
-                finally:
-                    try:
-                        os.unlink(tmp_path)
-                    except Exception as e:
-                        print(f"Unix cleanup error: {e}")
-                        
+            return await lint_service.lint(code)
         except Exception as e:
             return {"error": str(e)}
             
             
-async def agent_process(user_query):
-    try:
-        print(f"Initializing agents for query: {user_query}")  # Debug log
-        
-        # Initialize your agents here
-        coder = AssistantAgent(
-            name="Coder",
-            system_message="You are an expert Python developer...",
-            llm_config=llm_config
-        )
+class StreamingGroupChat(GroupChat):
+    """GroupChat that reports every message to the request's event stream"""
+    def append(self, message, speaker):
+        super().append(message, speaker)
+        if message.get("content"):
+            emit("message", name=message.get("name"), role=message.get("role"),
+                 content=message["content"])
 
-        debugger = AssistantAgent(
-            name="Debugger",
-            system_message="You are a senior software engineer. Analyze code for issues and suggest improvements.",
-            llm_config=llm_config
-        )
+# Agent Pool Configuration
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "128"))  # Idle agent sets kept for reuse
 
-        user_proxy = UserProxyAgent(
-            name="User_Proxy",
-            human_input_mode="NEVER",
-            max_consecutive_auto_reply=5,
-            code_execution_config=False,
-            llm_config=False
-        )
+def build_agents():
+    """Create a Coder/Debugger group chat with its LLM clients and tools"""
+    coder = AssistantAgent(
+        name="Coder",
+        system_message="You are an expert Python developer...",
+        llm_config=llm_config
+    )
 
-        group_chat = GroupChat(
-            agents=[user_proxy, coder, debugger],
-            messages=[],
-            max_round=6,
-            speaker_selection_method="round_robin"
-        )
+    debugger = AssistantAgent(
+        name="Debugger",
+        system_message="You are a senior software engineer. Analyze code for issues and suggest improvements.",
+        llm_config=llm_config
+    )
 
-        manager = GroupChatManager(
-            groupchat=group_chat,
-            llm_config=llm_config
-        )
-        
-        print("Agents initialized, starting chat...")  # Debug log
+    user_proxy = UserProxyAgent(
+        name="User_Proxy",
+        human_input_mode="NEVER",
+        max_consecutive_auto_reply=5,
+        code_execution_config=False,
+        llm_config=False
+    )
+
+    group_chat = StreamingGroupChat(
+        agents=[user_proxy, coder, debugger],
+        messages=[],
+        max_round=6,
+        speaker_selection_method="round_robin"
+    )
+
+    manager = GroupChatManager(
+        groupchat=group_chat,
+        llm_config=llm_config
+    )
+
+    @user_proxy.register_for_execution()
+    @debugger.register_for_llm(description="Execute Python code and get results")
+    async def python_executor(code: str) -> str:
+        emit("tool_call", tool="python_executor", code=code)
+        result = await CodeTools.execute_python(code)
+        emit("tool_result", tool="python_executor", result=result)
+        return str(result)  # Ensure consistent string response
+
+    @user_proxy.register_for_execution()
+    @debugger.register_for_llm(description="Lint Python code for quality checks")
+    async def pylint_checker(code: str) -> str:
+        emit("tool_call", tool="pylint_checker", code=code)
+        result = await CodeTools.run_linter(code)
+        emit("tool_result", tool="pylint_checker", result=result)
+        return str(result)  # Ensure consistent string response
+
+    return user_proxy, group_chat, manager
+
+class AgentFactory:
+    """Hands out pooled agent sets, reset between requests, so config parsing and
+    LLM client construction happen once per agent set instead of once per request"""
+    def __init__(self, builder, max_idle=AGENT_POOL_SIZE):
+        self.builder = builder
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self.stats = {"built": 0, "reused": 0, "build_seconds": 0.0}
+
+    def acquire(self):
+        with self._lock:
+            agents = self._idle.pop() if self._idle else None
+            if agents is not None:
+                self.stats["reused"] += 1
+        if agents is None:
+            start = time.perf_counter()
+            agents = self.builder()
+            with self._lock:
+                self.stats["built"] += 1
+                self.stats["build_seconds"] += time.perf_counter() - start
+        return agents
+
+    def release(self, agents, healthy=True):
+        """Reset an agent set's conversation state and return it to the pool"""
+        if not healthy:
+            return
+        user_proxy, group_chat, manager = agents
+        for agent in [*group_chat.agents, manager]:
+            agent.reset()
+        group_chat.reset()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(agents)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats, idle=len(self._idle))
+        avg = stats["build_seconds"] / stats["built"] if stats["built"] else 0.0
+        stats["avg_build_seconds"] = avg
+        stats["build_seconds_avoided"] = stats["reused"] * avg
+        return stats
+
+# Looks up build_agents at call time so tests can swap in a stubbed builder
+agent_factory = AgentFactory(lambda: build_agents())
+
+async def agent_process(user_query):
+    agents = agent_factory.acquire()
+    healthy = False
+    try:
+        user_proxy, group_chat, manager = agents
+        print(f"Starting chat for query: {user_query}")  # Debug log
         await user_proxy.a_initiate_chat(
             manager,
             message=f"User request: {user_query}\n\nGenerate and validate Python code following best practices."
         )
         
         print(f"Chat completed with {len(group_chat.messages)} messages")  # Debug log
-        return group_chat.messages
+        healthy = True
+        # Copy before the pooled group chat is reset for the next request
+        return list(group_chat.messages)
         
     except Exception as e:
         print(f"Error in agent_process: {str(e)}")  # Debug log
         raise
+    finally:
+        agent_factory.release(agents, healthy)
 
-        @user_proxy.register_for_execution()
-        @debugger.register_for_llm(description="Execute Python code and get results")
-        async def python_executor(code: str) -> str:
-            result = await CodeTools.execute_python(code)
-            return str(result)  # Ensure consistent string response
-
-        @user_proxy.register_for_execution()
-        @debugger.register_for_llm(description="Lint Python code for quality checks")
-        async def pylint_checker(code: str) -> str:
-            result = await CodeTools.run_linter(code)
-            return str(result)  # Ensure consistent string response
+def extract_code(chat_messages):
+    """Pick the most relevant Coder output, preferring fenced code blocks"""
+    output = ""
+    for msg in chat_messages:
+        if msg.get('name') == 'Coder' and msg.get('content'):
+            content = msg['content']
+            # Extract code blocks
+            if '```python' in content:
+                output = content.split('```python')[1].split('```')[0].strip()
+                break
+            elif '```' in content:
+                output = content.split('```')[1].split('```')[0].strip()
+                break
+            else:
+                output = content
 
-        return group_chat.messages
+    return output or "No code was generated. Please try a different query."
 
 @app.route('/')
-def index():
-    return render_template('index.html')
+async def index():
+    return await render_template('index.html')
 
 @app.route('/process', methods=['POST'])
-def process_request():
-    user_query = request.json.get('query', '')
-    
-    async def run_agent():
-        return await agent_process(user_query)
+async def process_request():
+    data = await request.get_json()
+    user_query = (data or {}).get('query', '')
     
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        chat_messages = loop.run_until_complete(run_agent())
-        loop.close()
-        
-        # Process the conversation to extract the most relevant output
-        output = ""
-        for msg in chat_messages:
-            if msg.get('name') == 'Coder' and msg.get('content'):
-                content = msg['content']
-                # Extract code blocks
-                if '```python' in content:
-                    output = content.split('```python')[1].split('```')[0].strip()
-                    break
-                elif '```' in content:
-                    output = content.split('```')[1].split('```')[0].strip()
-                    break
-                else:
-                    output = content
-        
-        if not output:
-            output = "No code was generated. Please try a different query."
-
+        chat_messages = await agent_process(user_query)
         return jsonify({
             "status": "success",
-            "output": output,
+            "output": extract_code(chat_messages),
             "conversation": chat_messages
         })
     except Exception as e:
@@ -267,5 +715,59 @@ def process_request():
             "error": str(e)
         }), 500
 
+@app.route('/process/stream', methods=['POST'])
+async def process_stream():
+    """NDJSON version of /process: one {"event": ...} line per message, tool call and output chunk"""
+    data = await request.get_json()
+    user_query = (data or {}).get('query', '')
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    async def run():
+        # Sandbox threads report through call_soon_threadsafe, so one sink serves both sides
+        process_events.set(lambda item: loop.call_soon_threadsafe(events.put_nowait, item))
+        try:
+            chat_messages = await agent_process(user_query)
+            emit("code", code=extract_code(chat_messages))
+            emit("done", messages=len(chat_messages))
+        except Exception as e:
+            emit("error", error=str(e))
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, None)
+
+    async def generate():
+        task = asyncio.create_task(run())
+        try:
+            yield ndjson("started", {"query": user_query})
+            while True:
+                try:
+                    item = await asyncio.wait_for(events.get(), STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ndjson("keepalive", {})
+                    continue
+                if item is None:
+                    break
+                yield ndjson(*item)
+        finally:
+            # The client went away or the stream finished; stop the chat either way
+            task.cancel()
+
+    return Response(generate(), mimetype="application/x-ndjson",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def ndjson(event, data):
+    return json.dumps({"event": event, **data}, default=str) + "\n"
+
+@app.route('/metrics')
+async def metrics():
+    return jsonify({
+        "agents": agent_factory.snapshot(),
+        "sandbox": sandbox_pool.stats,
+        "lint": lint_service.stats,
+        "result_cache": result_cache.stats()
+    })
+
 if __name__ == '__main__':
+    sandbox_pool.start()
+    lint_service.start()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
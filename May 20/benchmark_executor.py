@@ -0,0 +1,87 @@
+"""Per-call subprocess.run (old execute_python) vs the warm sandbox pool.
+
+Reports sustained runs per second and the latency of paced single runs. Reusing
+workers (--max-runs, default SANDBOX_MAX_RUNS) is where the throughput comes from;
+with --max-runs 1, a fresh interpreter per run, sustained throughput is bound by
+worker startup like subprocess.run and the pool's gain is latency while spare
+workers are warm.
+
+Usage: python benchmark_executor.py [--runs 50] [--concurrency 4] [--max-runs 20]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from app import SANDBOX_MAX_RUNS, SandboxPool
+
+SNIPPET = "total = sum(i * i for i in range(10000))\nprint(total)\n"
+
+
+async def legacy_execute(code):
+    # The previous implementation: temp file plus a blocking interpreter start per run
+    with tempfile.NamedTemporaryFile(suffix=".py", mode="w", delete=False) as tmp:
+        tmp.write(code)
+        tmp_path = tmp.name
+    try:
+        result = subprocess.run([sys.executable, tmp_path], capture_output=True, text=True, timeout=10)
+        return {"success": result.returncode == 0, "output": result.stdout, "error": result.stderr}
+    finally:
+        os.unlink(tmp_path)
+
+
+async def measure(execute, runs, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            result = await execute(SNIPPET)
+            if not result["success"]:
+                raise RuntimeError(result["error"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(runs)))
+    return runs / (time.perf_counter() - start)
+
+
+async def paced_latency(execute, runs, gap):
+    """Median milliseconds per run when requests arrive one at a time, `gap` seconds apart"""
+    timings = []
+    for _ in range(runs):
+        await asyncio.sleep(gap)  # Leaves time for a replacement worker to start
+        start = time.perf_counter()
+        await execute(SNIPPET)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def main(args):
+    legacy = await measure(legacy_execute, args.runs, args.concurrency)
+    legacy_latency = await paced_latency(legacy_execute, args.paced_runs, args.gap)
+    print(f"subprocess.run  {legacy:8.1f} runs/s  {legacy_latency:7.1f} ms/run paced")
+
+    pool = SandboxPool(size=args.concurrency, max_runs=args.max_runs)
+    pool.start()
+    await pool.run("pass")  # Wait until the first worker is up
+    try:
+        pooled = await measure(pool.run, args.runs, args.concurrency)
+        pooled_latency = await paced_latency(pool.run, args.paced_runs, args.gap)
+    finally:
+        pool.close()
+    print(f"sandbox pool    {pooled:8.1f} runs/s  {pooled_latency:7.1f} ms/run paced  "
+          f"({pooled / legacy:.1f}x throughput, {legacy_latency / pooled_latency:.1f}x latency, "
+          f"max_runs={args.max_runs})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-runs", type=int, default=SANDBOX_MAX_RUNS, help="runs per worker before recycling")
+    parser.add_argument("--paced-runs", type=int, default=20)
+    parser.add_argument("--gap", type=float, default=0.2, help="seconds between paced runs")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,79 @@
+"""Resident pylint worker for CodeTools.run_linter.
+
+Imports pylint once and lints snippets from memory. Reads one JSON request per
+line ({"code": ...}) and answers with one JSON line
+({"score", "messages", "output", "error"}).
+"""
+import io
+import json
+import os
+import sys
+
+from pylint.lint import Run, pylinter
+from pylint.reporters import CollectingReporter
+
+PYLINT_ARGS = ["--persistent=n", "--score=y", "--from-stdin", "snippet.py"]
+
+_current_code = ""
+
+
+def _read_snippet():
+    return _current_code
+
+
+# --from-stdin reads the module source through this hook; serve it from memory
+pylinter._read_stdin = _read_snippet
+
+
+def format_message(message):
+    return f"{message.path}:{message.line}:{message.column}: {message.msg_id}: {message.msg} ({message.symbol})"
+
+
+def lint(code):
+    global _current_code
+    _current_code = code
+    reporter = CollectingReporter()
+    stderr = io.StringIO()
+    saved_stderr, sys.stderr = sys.stderr, stderr
+    try:
+        run = Run(PYLINT_ARGS, reporter=reporter, exit=False)
+    finally:
+        sys.stderr = saved_stderr
+
+    score = run.linter.stats.global_note or 0
+    messages = [
+        {
+            "line": m.line,
+            "column": m.column,
+            "msg_id": m.msg_id,
+            "symbol": m.symbol,
+            "category": m.category,
+            "message": m.msg,
+        }
+        for m in reporter.messages
+    ]
+    output = "\n".join(format_message(m) for m in reporter.messages)
+    output += f"\n\nYour code has been rated at {score:.2f}/10\n"
+    return {"score": score, "messages": messages, "output": output, "error": stderr.getvalue()}
+
+
+def main():
+    # Keep the protocol on private descriptors; pylint's own prints go to devnull
+    channel_in = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    channel_out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    lint("pass\n")  # Warm up checker registration and astroid before the first request
+    for line in channel_in:
+        try:
+            result = lint(json.loads(line)["code"])
+        except Exception as e:
+            result = {"score": 0, "messages": [], "output": "", "error": f"Linter error: {e}"}
+        channel_out.write(json.dumps(result) + "\n")
+        channel_out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Concurrent /process requests against a stubbed LLM, in-process over ASGI.
+
+The synchronous OpenAI client call that AutoGen makes for each agent turn is
+replaced by a fixed blocking delay and a canned reply. Turns still travel the
+real path, through the event loop's default executor, so throughput reflects
+the server path, executor size included, rather than Gemini.
+
+Usage: python load_test_process.py [--latency 0.2] [--concurrency 1 10 100 300]
+       LLM_EXECUTOR_THREADS=5 python load_test_process.py  # The stock executor size on 1 CPU
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "stub")
+
+from autogen.oai.client import OpenAIClient  # noqa: E402
+from openai.types.chat import ChatCompletion  # noqa: E402
+
+import app as service  # noqa: E402
+
+STUB_REPLY = "```python\nprint('stub')\n```"
+
+
+def stub_client(latency):
+    def create(self, params):
+        time.sleep(latency)  # Simulated blocking LLM round-trip, holding an executor thread
+        return ChatCompletion.model_validate({
+            "id": "stub", "object": "chat.completion", "created": 0, "model": params.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": STUB_REPLY}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+    OpenAIClient.create = create
+
+
+async def run_level(client, concurrency, requests_per_level):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            response = await client.post("/process", json={"query": f"task {i}"})
+            body = await response.get_json()
+            if body["status"] != "success":
+                raise RuntimeError(body)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests_per_level)))
+    return requests_per_level / (time.perf_counter() - start)
+
+
+async def main(args):
+    stub_client(args.latency)
+    service.llm_config["cache_seed"] = None  # Every turn reaches the stubbed client
+    # test_app runs the before_serving hooks, which size the default executor
+    async with service.app.test_app() as test_app:
+        client = test_app.test_client()
+        baseline = None
+        for concurrency in args.concurrency:
+            total = max(concurrency * args.requests_per_client, concurrency)
+            await run_level(client, concurrency, concurrency)  # Warm the agent pool to this depth
+            throughput = await run_level(client, concurrency, total)
+            baseline = baseline or throughput
+            print(f"in-flight={concurrency:>4} requests/s={throughput:8.1f} speedup={throughput / baseline:6.1f}x")
+    print(f"executor threads: {service.LLM_EXECUTOR_THREADS}")
+    print(f"agent factory: {service.agent_factory.snapshot()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub LLM delay per turn in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100, 300])
+    parser.add_argument("--requests-per-client", type=int, default=2)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,138 @@
+"""Pre-started sandbox worker for CodeTools.execute_python.
+
+Reads one JSON request per line ({"code": ..., "cpu_seconds": ..., "stream": ...})
+and answers with one JSON line ({"success", "output", "error"}). With "stream"
+set, output is also forwarded while the snippet runs as {"stream": "stdout" or
+"stderr", "data": ...} frames ahead of the result. The protocol runs on private
+copies of stdin/stdout, so a snippet's print() or writes to fds 0/1 cannot
+corrupt it. Those copies stay open in this process, though: code that goes
+looking for them can still reach the pipe, so this is not a security boundary.
+"""
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import time
+import traceback
+
+try:
+    import resource  # Unix only; Windows workers run without kernel limits
+except ImportError:
+    resource = None
+
+FILE_SIZE_LIMIT = 10 * 1024 * 1024
+FRAME_INTERVAL = 0.05  # Seconds between output frames for chatty snippets
+FRAME_MAX_CHARS = 8192
+
+
+class FrameChannel:
+    """Forwards stdout and stderr writes to the parent in line-aligned frames.
+
+    Both streams share one pending list and one timer, so frames leave in the
+    order the snippet wrote them.
+    """
+    def __init__(self, channel):
+        self.channel = channel
+        self._pending = []  # (stream, text) in write order
+        self._pending_chars = 0
+        self._last_frame = 0.0  # The first line goes out immediately
+
+    def write(self, stream, text):
+        self._pending.append((stream, text))
+        self._pending_chars += len(text)
+        due = time.monotonic() - self._last_frame >= FRAME_INTERVAL
+        if self._pending_chars >= FRAME_MAX_CHARS or ("\n" in text and due):
+            self.send_frames()
+
+    def send_frames(self):
+        if not self._pending:
+            return
+        # One frame per run of consecutive writes to the same stream
+        for stream, parts in itertools.groupby(self._pending, key=lambda part: part[0]):
+            frame = {"stream": stream, "data": "".join(text for _, text in parts)}
+            self.channel.write(json.dumps(frame) + "\n")
+        self.channel.flush()
+        self._pending, self._pending_chars = [], 0
+        self._last_frame = time.monotonic()
+
+
+class FrameWriter(io.StringIO):
+    """Captures a stream and, when streaming, hands each write to the shared FrameChannel"""
+    def __init__(self, name, frames=None):
+        super().__init__()
+        self.name = name
+        self.frames = frames
+
+    def write(self, text):
+        written = super().write(text)
+        if self.frames is not None and text:
+            self.frames.write(self.name, text)
+        return written
+
+
+def apply_limits(memory_mb):
+    if resource is None:
+        return
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (FILE_SIZE_LIMIT, FILE_SIZE_LIMIT))
+
+
+def set_cpu_budget(seconds):
+    """Allow this run `seconds` of CPU on top of what the worker used so far"""
+    if resource is None or not seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def run_snippet(code, channel=None):
+    frames = FrameChannel(channel) if channel is not None else None
+    stdout, stderr = FrameWriter("stdout", frames), FrameWriter("stderr", frames)
+    success = True
+    saved_stdin = sys.stdin
+    sys.stdin = io.StringIO("")
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            exec(compile(code, "<snippet>", "exec"), {"__name__": "__main__", "__builtins__": __builtins__})
+        except SystemExit as e:
+            success = e.code in (None, 0)
+        except BaseException:
+            success = False
+            etype, value, tb = sys.exc_info()
+            # Skip this frame so the traceback starts at the snippet
+            traceback.print_exception(etype, value, tb.tb_next)
+    sys.stdin = saved_stdin
+    if frames is not None:
+        frames.send_frames()
+    return {"success": success, "output": stdout.getvalue(), "error": stderr.getvalue()}
+
+
+def main():
+    memory_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+
+    # Keep the protocol on private descriptors and point fds 0/1 at devnull
+    channel_in = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    channel_out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    apply_limits(memory_mb)
+    for line in channel_in:
+        request = json.loads(line)
+        set_cpu_budget(request.get("cpu_seconds"))
+        stream_to = channel_out if request.get("stream") else None
+        channel_out.write(json.dumps(run_snippet(request["code"], stream_to)) + "\n")
+        channel_out.flush()
+
+
+if __name__ == "__main__":
+    main()
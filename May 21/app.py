@@ -1,13 +1,27 @@
 # app.py
 import os
+import io
 import uuid
+import re
+import sqlite3
+import hashlib
 import asyncio
-from flask import Flask, render_template, request, send_from_directory
+import threading
+import time
+import math
+import multiprocessing
+from collections import deque
+from contextlib import closing, contextmanager
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from flask import Flask, render_template, request, send_from_directory, jsonify
 from werkzeug.utils import secure_filename
+import httpx
+import numpy as np
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 from autogen import AssistantAgent, UserProxyAgent, GroupChat, GroupChatManager
 from dotenv import load_dotenv
@@ -18,7 +32,8 @@ load_dotenv()
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['STATIC_FOLDER'] = 'static'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+# Large uploads are summarized in chunks, so the cap is about disk rather than RAM
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv("MAX_UPLOAD_MB", "4096")) * 1024 * 1024
 
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['STATIC_FOLDER'], exist_ok=True)
@@ -26,46 +41,741 @@ os.makedirs(app.config['STATIC_FOLDER'], exist_ok=True)
 # Configure Gemini
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
+# One keep-alive HTTP client shared by every agent's LLM client, built once per process
+llm_http_client = httpx.Client(timeout=120)
+
 config_list = [
     {
         "model": "gemini-2.0-flash-001",
         "api_key": os.getenv("GEMINI_API_KEY"),
-        "base_url": "https://generativelanguage.googleapis.com/v1beta"
+        "base_url": "https://generativelanguage.googleapis.com/v1beta",
+        "http_client": llm_http_client
     }
 ]
 
-async def analyze_data(file_path):
-    df = pd.read_csv(file_path)
-    summary = df.describe().to_markdown()
-    return f"Data Summary:\n{summary}"
+# Idle agent sets kept for reuse across requests
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "16"))
+
+# Ingestion Configuration
+CSV_ENGINE = os.getenv("CSV_ENGINE", "auto")  # "auto" uses pyarrow when installed, else the C parser
+CATEGORY_MAX_UNIQUE_RATIO = float(os.getenv("CATEGORY_MAX_UNIQUE_RATIO", "0.5"))
+
+COLUMNAR_CACHE_DIR = os.getenv("COLUMNAR_CACHE_DIR", "columnar_cache")
+COLUMNAR_CACHE_MAX_BYTES = int(os.getenv("COLUMNAR_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+try:
+    import pyarrow as pa  # Optional: multithreaded CSV parser and the columnar upload cache
+    HAS_PYARROW = True
+except ImportError:
+    pa = None
+    HAS_PYARROW = False
+    print("WARNING: pyarrow is not installed; the columnar upload cache is off and "
+          "every upload is parsed from CSV (pip install -r requirements.txt)")
+
+ingest_metrics = {"uploads": 0, "parse_seconds": 0.0, "memory_bytes": 0, "memory_saved_bytes": 0,
+                  "columnar_hits": 0}
+ingest_lock = threading.Lock()
+
+def csv_engine():
+    if CSV_ENGINE == "auto":
+        return "pyarrow" if HAS_PYARROW else "c"
+    return CSV_ENGINE
+
+def compact_dtypes(df):
+    """Downcast numeric columns and store repetitive strings as categoricals"""
+    for column in df.columns:
+        series = df[column]
+        kind = series.dtype.kind
+        if kind == "i":
+            df[column] = pd.to_numeric(series, downcast="integer")
+        elif kind == "u":
+            df[column] = pd.to_numeric(series, downcast="unsigned")
+        elif kind == "f":
+            narrow = series.astype("float32")
+            # Only when every value survives the round trip
+            if narrow.astype("float64").equals(series):
+                df[column] = narrow
+        elif kind == "O" and len(series):
+            if series.nunique(dropna=True) <= CATEGORY_MAX_UNIQUE_RATIO * len(series):
+                df[column] = series.astype("category")
+    return df
+
+class ColumnarCache:
+    """Parsed uploads kept as Arrow IPC files named by the CSV's content hash.
+
+    A repeat upload memory-maps the file instead of parsing the CSV again.
+    Hits refresh the file's mtime, and the oldest files go first once the
+    directory outgrows max_bytes. Worker processes share the directory, so
+    the filesystem is the only index."""
+    def __init__(self, root=COLUMNAR_CACHE_DIR, max_bytes=COLUMNAR_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.enabled = HAS_PYARROW and max_bytes > 0
+        if self.enabled:
+            os.makedirs(root, exist_ok=True)
+
+    def _path(self, dataset_hash):
+        return os.path.join(self.root, f"{dataset_hash}.arrow")
+
+    def get(self, dataset_hash, numeric_only=False):
+        """Returns (df, column count of the stored upload), or None on a miss.
+
+        numeric_only skips converting text columns, which dominates load time,
+        unless the upload has no numeric columns at all."""
+        if not self.enabled:
+            return None
+        path = self._path(dataset_hash)
+        try:
+            source = pa.memory_map(path, 'r')
+        except (FileNotFoundError, OSError):
+            return None
+        table = pa.ipc.open_file(source).read_all()
+        columns = table.num_columns
+        numeric = [field.name for field in table.schema
+                   if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)]
+        if numeric_only and numeric:
+            table = table.select(numeric)
+        os.utime(path)
+        return table.to_pandas(), columns
+
+    def put(self, dataset_hash, df):
+        if not self.enabled:
+            return
+        path = self._path(dataset_hash)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+        except (pa.ArrowException, OSError) as e:
+            # Mixed-type object columns have no Arrow type; those uploads are just parsed each time
+            print(f"Columnar cache skipped {dataset_hash}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(".arrow"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)  # Readers that already mapped it keep their mapping
+            except OSError:
+                pass
+            total -= size
+
+    def snapshot(self):
+        if not self.enabled:
+            return {"enabled": False}
+        sizes = [entry.stat().st_size for entry in os.scandir(self.root) if entry.name.endswith(".arrow")]
+        return {"enabled": True, "files": len(sizes), "bytes": sum(sizes), "max_bytes": self.max_bytes}
+
+columnar_cache = ColumnarCache()
+
+def load_csv(file_path, dataset_hash=None):
+    """Parse an upload once into a compact frame; returns (df, ingest stats).
+
+    With a dataset_hash, a cached copy of an earlier upload is used when there
+    is one, holding only the numeric columns that the summary and charts read."""
+    if dataset_hash is not None:
+        start = time.perf_counter()
+        cached = columnar_cache.get(dataset_hash, numeric_only=True)
+        if cached is not None:
+            df, columns = cached
+            stats = {
+                "engine": "columnar cache",
+                "rows": len(df),
+                "columns": columns,
+                "parse_seconds": time.perf_counter() - start,
+                "compact_seconds": 0.0,
+                "memory_bytes": int(df.memory_usage(deep=True).sum()),
+                "memory_saved_bytes": 0,
+                "columnar_hit": True,
+            }
+            print(f"Loaded {file_path} from the columnar cache: {stats}")
+            return df, stats
+
+    engine = csv_engine()
+    start = time.perf_counter()
+    df = pd.read_csv(file_path, engine=engine)
+    parse_seconds = time.perf_counter() - start
+    raw_bytes = int(df.memory_usage(deep=True).sum())
+    compact_dtypes(df)
+    memory_bytes = int(df.memory_usage(deep=True).sum())
+    stats = {
+        "engine": engine,
+        "rows": len(df),
+        "columns": len(df.columns),
+        "parse_seconds": parse_seconds,
+        "compact_seconds": time.perf_counter() - start - parse_seconds,
+        "memory_bytes": memory_bytes,
+        "memory_saved_bytes": raw_bytes - memory_bytes,
+    }
+    print(f"Parsed {file_path}: {stats}")
+    if dataset_hash is not None:
+        columnar_cache.put(dataset_hash, df)
+    return df, stats
+
+def record_ingest(stats):
+    with ingest_lock:
+        ingest_metrics["uploads"] += 1
+        ingest_metrics["parse_seconds"] += stats["parse_seconds"]
+        ingest_metrics["memory_bytes"] += stats["memory_bytes"]
+        ingest_metrics["memory_saved_bytes"] += stats["memory_saved_bytes"]
+        ingest_metrics["columnar_hits"] += stats.get("columnar_hit", False)
+
+def describe_frame(df):
+    """df.describe() with statistics computed in float64, whatever the stored dtypes"""
+    numeric_cols = df.select_dtypes('number').columns
+    if len(numeric_cols) == 0:
+        return df.describe()
+    # One column at a time, so upcasting never copies the whole frame
+    return pd.concat([df[col].astype('float64').describe() for col in numeric_cols], axis=1)
+
+# Streaming Statistics Configuration
+STREAMING_THRESHOLD_MB = int(os.getenv("STREAMING_THRESHOLD_MB", "64"))  # Larger uploads are read in chunks
+STREAM_BLOCK_MB = int(os.getenv("STREAM_BLOCK_MB", "16"))  # Bytes of CSV handed to a worker at a time
+DIGEST_COMPRESSION = 200  # Centroids per digest is about half of this
+PLOT_SAMPLE_ROWS = int(os.getenv("PLOT_SAMPLE_ROWS", "100000"))
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+class CentroidDigest:
+    """Merging t-digest: approximate quantiles in bounded memory, mergeable across chunks"""
+    def __init__(self, means=None, weights=None, compression=DIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0) if means is None else means
+        self.weights = np.empty(0) if weights is None else weights
+
+    def add(self, values):
+        self._compress(np.concatenate([self.means, values]),
+                       np.concatenate([self.weights, np.ones(len(values))]))
+
+    def merge(self, other):
+        self._compress(np.concatenate([self.means, other.means]),
+                       np.concatenate([self.weights, other.weights]))
+
+    def _compress(self, means, weights):
+        if len(means) == 0:
+            return
+        order = np.argsort(means, kind='mergesort')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        q_left = (np.cumsum(weights) - weights) / total
+        # k1 scale: every centroid spans at most one unit of k, so the tails stay fine-grained
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q_left - 1)
+        bins = np.floor(k - k[0])
+        starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q, minimum, maximum):
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * total, np.r_[0, centers, total], np.r_[minimum, self.means, maximum]))
+
+class ColumnStats:
+    """Exact count/mean/variance/min/max, merged with Chan's parallel update"""
+    def __init__(self, count=0, mean=0.0, m2=0.0, minimum=math.inf, maximum=-math.inf):
+        self.count, self.mean, self.m2 = count, mean, m2
+        self.minimum, self.maximum = minimum, maximum
+
+    @classmethod
+    def of(cls, values):
+        if len(values) == 0:
+            return cls()
+        mean = values.mean()
+        return cls(len(values), mean, float(((values - mean) ** 2).sum()), values.min(), values.max())
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+def block_stats(header, block, sample_rows):
+    """Worker side: parse one block of CSV lines and reduce it to mergeable pieces.
+
+    Returns (rows, numeric column names, {name: (ColumnStats, CentroidDigest)},
+    sample of numeric rows, their random keys)."""
+    chunk = pd.read_csv(io.BytesIO(header + block))
+    numeric = chunk.select_dtypes('number')
+    stats = {}
+    for name in numeric.columns:
+        values = numeric[name].to_numpy(dtype='float64')
+        values = values[~np.isnan(values)]
+        digest = CentroidDigest()
+        digest.add(values)
+        stats[name] = (ColumnStats.of(values), digest)
+    # Reservoir sample by random keys: the k smallest keys overall are a uniform sample
+    keys = np.random.default_rng().random(len(numeric))
+    if len(numeric) > sample_rows:
+        keep = np.sort(np.argpartition(keys, sample_rows)[:sample_rows])
+        numeric, keys = numeric.iloc[keep], keys[keep]
+    return len(chunk), list(numeric.columns), stats, numeric, keys
+
+def csv_blocks(file_path, block_bytes):
+    """Yield (header, block) with every block ending on a record boundary.
+
+    Quote parity decides whether a newline ends a record, so quoted fields
+    containing newlines never straddle two blocks."""
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        carry = b''
+        while True:
+            data = f.read(block_bytes)
+            if not data:
+                break
+            block = carry + data
+            end = len(block)
+            while True:
+                end = block.rfind(b'\n', 0, end)
+                if end < 0 or block.count(b'"', 0, end) % 2 == 0:
+                    break
+            if end < 0:
+                carry = block  # No record boundary yet; read more
+                continue
+            carry = block[end + 1:]
+            yield header, block[:end + 1]
+        if carry.strip():
+            yield header, carry
+
+def streaming_describe(file_path):
+    """describe() for CSVs of any size: blocks parsed and reduced in parallel, flat memory.
+
+    Returns (summary frame, random sample of numeric rows for plotting, ingest stats)."""
+    start = time.perf_counter()
+    columns, dropped = None, set()  # name -> [ColumnStats, CentroidDigest]
+    sample, sample_keys = None, np.empty(0)
+    rows = blocks = 0
+
+    def merge(result):
+        nonlocal columns, sample, sample_keys, rows
+        block_rows, numeric_names, stats, block_sample, keys = result
+        if columns is None:
+            columns = {name: [ColumnStats(), CentroidDigest()] for name in numeric_names}
+        # A column that stops parsing as numbers is not numeric for the whole file either
+        for name in [name for name in columns if name not in stats]:
+            dropped.add(name)
+            del columns[name]
+        for name, (column_stats, digest) in stats.items():
+            if name in columns:
+                columns[name][0].merge(column_stats)
+                columns[name][1].merge(digest)
+
+        block_sample = block_sample[list(columns)]
+        block_sample.index = block_sample.index + rows
+        rows += block_rows
+        sample = block_sample if sample is None else pd.concat([sample[list(columns)], block_sample])
+        sample_keys = np.concatenate([sample_keys, keys])
+        if len(sample) > PLOT_SAMPLE_ROWS:
+            keep = np.argpartition(sample_keys, PLOT_SAMPLE_ROWS)[:PLOT_SAMPLE_ROWS]
+            sample, sample_keys = sample.iloc[keep], sample_keys[keep]
+
+    # Bounded in-flight blocks keep memory flat however large the file is;
+    # merging in submission order keeps row positions right
+    jobs = ((header, block, PLOT_SAMPLE_ROWS)
+            for header, block in csv_blocks(file_path, STREAM_BLOCK_MB * 1024 * 1024))
+    with closing(map_in_pool(block_stats, jobs, 2 * ANALYSIS_WORKERS)) as results:
+        for result in results:
+            merge(result)
+            blocks += 1
+
+    columns = columns or {}
+    summary = pd.DataFrame(
+        {name: [
+            float(stats.count),
+            stats.mean if stats.count else np.nan,
+            math.sqrt(stats.m2 / (stats.count - 1)) if stats.count > 1 else np.nan,
+            stats.minimum if stats.count else np.nan,
+            *(digest.quantile(q, stats.minimum, stats.maximum) if stats.count else np.nan
+              for q in (0.25, 0.5, 0.75)),
+            stats.maximum if stats.count else np.nan,
+        ] for name, (stats, digest) in columns.items()},
+        index=DESCRIBE_INDEX
+    )
+    sample = pd.DataFrame() if sample is None else sample.sort_index()
+    stats = {
+        "engine": "c (parallel blocks)",
+        "rows": rows,
+        "columns": len(columns),
+        "blocks": blocks,
+        "parse_seconds": time.perf_counter() - start,
+        "memory_bytes": int(sample.memory_usage(deep=True).sum()),
+        "memory_saved_bytes": 0,
+        "sample_rows": len(sample),
+    }
+    if dropped:
+        print(f"Columns with non-numeric values left out of the summary: {sorted(dropped)}")
+    print(f"Streamed {file_path}: {stats}")
+    return summary, sample, stats
+
+def is_large_upload(file_path):
+    return os.path.getsize(file_path) > STREAMING_THRESHOLD_MB * 1024 * 1024
+
+def analyze_data(summary):
+    return f"Data Summary:\n{summary.to_markdown()}"
+
+# Rendering Configuration
+LINE_MAX_POINTS = int(os.getenv("LINE_MAX_POINTS", "2000"))  # Per series; a 10in figure is ~1000px wide
+SCATTER_MAX_POINTS = int(os.getenv("SCATTER_MAX_POINTS", "20000"))  # Above this, plot density instead
+RENDER_VERSION = "2"  # Bump when chart styling changes so cached PNGs are not reused
+
+render_metrics = {"renders": 0, "cache_hits": 0, "render_seconds": 0.0}
+render_lock = threading.Lock()
 
-async def generate_visualization(file_path, img_path, chart_type):
-    df = pd.read_csv(file_path)
-    plt.switch_backend('Agg')
-    plt.figure(figsize=(10, 6))
+def file_digest(file_path):
+    """sha256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chart_cache_key(dataset_hash, chart_type, columns=("*",)):
+    """Identifies a chart before rendering; "*" selects every numeric column"""
+    parts = [RENDER_VERSION, dataset_hash, chart_type, *map(str, columns)]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: keep the points that preserve a line's visual shape"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    bucket = (n - 2) / (threshold - 2)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * bucket) + 1, int((i + 1) * bucket) + 1
+        next_end = min(int((i + 2) * bucket) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+def plot_lines(ax, df, columns):
+    """df[columns].plot() with each series decimated to LINE_MAX_POINTS"""
+    x_all = df.index.to_numpy(dtype='float64')
+    for col in columns:
+        y = df[col].to_numpy(dtype='float64')
+        present = ~np.isnan(y)
+        x, y = lttb(x_all[present], y[present], LINE_MAX_POINTS)
+        ax.plot(x, y, label=str(col))
+    ax.legend()
+
+def plot_scatter(fig, ax, x, y):
+    """Scatter for small data, log-scaled hexbin density once points would overplot"""
+    if len(x) > SCATTER_MAX_POINTS:
+        density = ax.hexbin(x, y, gridsize=80, bins='log', mincnt=1, cmap='viridis')
+        fig.colorbar(density, ax=ax, label='count (log scale)')
+    else:
+        ax.scatter(x, y)
+
+def plot_histograms(fig, df, columns):
+    """df[columns].hist(), laid out on the given figure"""
+    ncols = math.ceil(math.sqrt(len(columns)))
+    nrows = math.ceil(len(columns) / ncols)
+    axes = fig.subplots(nrows, ncols, squeeze=False).ravel()
+    for ax, col in zip(axes, columns):
+        ax.hist(df[col].dropna().to_numpy(dtype='float64'), bins=10)
+        ax.set_title(str(col))
+        ax.grid(True)
+    for ax in axes[len(columns):]:
+        ax.set_visible(False)
+
+def generate_visualization(df, chart_type):
+    """Render the chart to PNG bytes, or None when there is nothing numeric to plot"""
+    # Figure objects only: no pyplot state shared between concurrent renders
+    fig = Figure(figsize=(10, 6))
     
-    numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns
+    numeric_cols = df.select_dtypes('number').columns
     
     if len(numeric_cols) == 0:
         return None
         
-    if chart_type == 'histogram':
-        df[numeric_cols].hist()
-    elif chart_type == 'bar':
-        df[numeric_cols].mean().plot(kind='bar')
+    if chart_type == 'bar':
+        df[numeric_cols].mean().plot(kind='bar', ax=fig.add_subplot())
     elif chart_type == 'line':
-        df[numeric_cols].plot()
+        plot_lines(fig.add_subplot(), df, numeric_cols)
     elif chart_type == 'box':
-        df[numeric_cols].plot(kind='box')
+        df[numeric_cols].plot(kind='box', ax=fig.add_subplot())
     elif chart_type == 'scatter' and len(numeric_cols) >= 2:
-        plt.scatter(df[numeric_cols[0]], df[numeric_cols[1]])
+        pair = df[[numeric_cols[0], numeric_cols[1]]].dropna()
+        plot_scatter(fig, fig.add_subplot(), pair.iloc[:, 0].to_numpy(), pair.iloc[:, 1].to_numpy())
     else:
-        df[numeric_cols].hist()  # default
+        plot_histograms(fig, df, numeric_cols)  # histogram and default
     
-    plt.tight_layout()
-    plt.savefig(img_path)
-    plt.close()
-    return img_path
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+def render_chart(df, chart_type):
+    """Worker side: returns (PNG bytes or None, render info)"""
+    start = time.perf_counter()
+    png = generate_visualization(df, chart_type)
+    return png, {"cached": False, "seconds": time.perf_counter() - start}
+
+def record_render(render):
+    with render_lock:
+        if render["cached"]:
+            render_metrics["cache_hits"] += 1
+        else:
+            render_metrics["renders"] += 1
+            render_metrics["render_seconds"] += render["seconds"]
+
+# Artifact Store Configuration
+ARTIFACT_INDEX = os.getenv("ARTIFACT_INDEX", "artifacts.sqlite3")
+ARTIFACT_TTL = int(os.getenv("ARTIFACT_TTL", str(24 * 3600)))  # Seconds since last access
+ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_MB", "256")) * 1024 * 1024
+ARTIFACT_SWEEP_INTERVAL = int(os.getenv("ARTIFACT_SWEEP_INTERVAL", "300"))
+ARTIFACT_NAME = re.compile(r"^chart_([0-9a-f]{32})\.png$")
+LEGACY_PLOT_NAME = re.compile(r"^plot_[0-9a-f-]+\.png$")  # Written before the store existed
+
+class ArtifactStore:
+    """Rendered charts in the static folder, named by content hash and indexed in sqlite.
+
+    Cache keys map to files, so identical charts share one file. Files expire
+    ARTIFACT_TTL seconds after their last access, and the least recently used go
+    first once the folder outgrows ARTIFACT_MAX_BYTES."""
+    def __init__(self, root, index_path=ARTIFACT_INDEX, ttl=ARTIFACT_TTL, max_bytes=ARTIFACT_MAX_BYTES):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()  # Flask serves each request on its own thread
+        self._db = sqlite3.connect(index_path, check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " name TEXT PRIMARY KEY, size INTEGER, created REAL, last_access REAL);"
+            "CREATE TABLE IF NOT EXISTS aliases (key TEXT PRIMARY KEY, name TEXT);"
+            "CREATE INDEX IF NOT EXISTS artifacts_lru ON artifacts (last_access);"
+        )
+        self._db.commit()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "deduplicated": 0,
+                      "evicted": 0, "reclaimed_bytes": 0, "sweeps": 0}
+        self._sweeper = None
+        self._stopping = threading.Event()
+
+    def lookup(self, key):
+        """Name of the chart stored under a cache key, if it is still on disk"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT a.name FROM aliases k JOIN artifacts a ON a.name = k.name WHERE k.key = ?", (key,)
+            ).fetchone()
+            if row is None or not os.path.exists(os.path.join(self.root, row[0])):
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE artifacts SET last_access = ? WHERE name = ?", (time.time(), row[0]))
+            self._db.commit()
+            self.stats["hits"] += 1
+            return row[0]
+
+    def put(self, data, key=None):
+        """Store PNG bytes under their content hash; returns the file name"""
+        name = f"chart_{hashlib.sha256(data).hexdigest()[:32]}.png"
+        path = os.path.join(self.root, name)
+        now = time.time()
+        with self._lock:
+            if os.path.exists(path):
+                self.stats["deduplicated"] += 1
+            else:
+                # Write then rename, so a concurrent request never serves a half-written PNG
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self.stats["stored"] += 1
+            self._db.execute(
+                "INSERT INTO artifacts (name, size, created, last_access) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET last_access = excluded.last_access",
+                (name, len(data), now, now)
+            )
+            if key is not None:
+                self._db.execute("INSERT OR REPLACE INTO aliases (key, name) VALUES (?, ?)", (key, name))
+            self._db.commit()
+        return name
+
+    def touch(self, name):
+        with self._lock:
+            self._db.execute("UPDATE artifacts SET last_access = ? WHERE name = ?", (time.time(), name))
+            self._db.commit()
+
+    def _remove(self, name):
+        """Delete one file and its index rows; returns the bytes freed"""
+        path = os.path.join(self.root, name)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            size = 0
+        self._db.execute("DELETE FROM artifacts WHERE name = ?", (name,))
+        self._db.execute("DELETE FROM aliases WHERE name = ?", (name,))
+        return size
+
+    def sweep(self):
+        """Drop expired, over-budget and unindexed charts; returns the bytes reclaimed"""
+        reclaimed = evicted = 0
+        with self._lock:
+            expired = self._db.execute(
+                "SELECT name FROM artifacts WHERE last_access < ?", (time.time() - self.ttl,)
+            ).fetchall()
+            for (name,) in expired:
+                reclaimed += self._remove(name)
+                evicted += 1
+
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+            if total > self.max_bytes:
+                for name, size in self._db.execute(
+                    "SELECT name, size FROM artifacts ORDER BY last_access"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    reclaimed += self._remove(name)
+                    total -= size
+                    evicted += 1
+
+            indexed = {name for (name,) in self._db.execute("SELECT name FROM artifacts")}
+            for entry in os.scandir(self.root):
+                orphan = ARTIFACT_NAME.match(entry.name) and entry.name not in indexed
+                if orphan or LEGACY_PLOT_NAME.match(entry.name) or entry.name.endswith(".tmp"):
+                    reclaimed += entry.stat().st_size
+                    os.remove(entry.path)
+            self._db.commit()
+            self.stats["evicted"] += evicted
+            self.stats["reclaimed_bytes"] += reclaimed
+            self.stats["sweeps"] += 1
+        if reclaimed:
+            print(f"Artifact sweep reclaimed {reclaimed} bytes ({evicted} charts evicted)")
+        return reclaimed
+
+    def start_sweeper(self, interval=ARTIFACT_SWEEP_INTERVAL):
+        def run():
+            while not self._stopping.wait(interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"Artifact sweep failed: {e}")
+        if self._sweeper is None:
+            self.sweep()
+            self._sweeper = threading.Thread(target=run, name="artifact-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def snapshot(self):
+        with self._lock:
+            count, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts"
+            ).fetchone()
+            return dict(self.stats, artifacts=count, bytes=size, max_bytes=self.max_bytes)
+
+artifact_store = ArtifactStore(app.config['STATIC_FOLDER'])
+
+# Analysis Pool Configuration
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(os.cpu_count() or 1)))
+ANALYSIS_MAX_PENDING = int(os.getenv("ANALYSIS_MAX_PENDING", str(2 * ANALYSIS_WORKERS)))  # Queued + running
+
+# Flask serves each request on its own thread and event loop, so a thread-level
+# semaphore is what bounds the pool work in flight across all of them. Slots cover
+# CPU work only; the agent conversation with Gemini never holds one.
+analysis_slots = threading.BoundedSemaphore(ANALYSIS_MAX_PENDING)
+analysis_executor = None
+executor_lock = threading.Lock()
+pool_metrics = {"workers": ANALYSIS_WORKERS, "max_pending": ANALYSIS_MAX_PENDING, "in_flight": 0, "rejected": 0}
+
+class AnalysisBusy(Exception):
+    """Every analysis slot is taken; the request is shed with 503 instead of queueing"""
+
+@contextmanager
+def analysis_slot():
+    if not analysis_slots.acquire(blocking=False):
+        with executor_lock:
+            pool_metrics["rejected"] += 1
+        raise AnalysisBusy()
+    with executor_lock:
+        pool_metrics["in_flight"] += 1
+    try:
+        yield
+    finally:
+        with executor_lock:
+            pool_metrics["in_flight"] -= 1
+        analysis_slots.release()
+
+def warm_worker():
+    """Pool initializer: pay pandas/matplotlib import and font-cache costs before the first job"""
+    pd.read_csv(io.StringIO("a,b\n1,2\n")).describe().to_markdown()
+    fig = Figure(figsize=(1, 1))
+    fig.add_subplot().plot([0, 1], [0, 1])
+    fig.savefig(io.BytesIO(), format='png')
+
+def get_analysis_executor():
+    global analysis_executor
+    with executor_lock:
+        if analysis_executor is None:
+            # spawn: workers start clean instead of forking a threaded web server
+            analysis_executor = ProcessPoolExecutor(
+                max_workers=ANALYSIS_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=warm_worker
+            )
+        return analysis_executor
+
+def discard_broken_pool(executor):
+    """A worker died (e.g. out of memory); start a fresh pool for the next request"""
+    global analysis_executor
+    with executor_lock:
+        if analysis_executor is executor:
+            analysis_executor = None
+
+async def run_in_pool(fn, *args):
+    executor = get_analysis_executor()
+    try:
+        return await asyncio.wrap_future(executor.submit(fn, *args))
+    except BrokenProcessPool:
+        discard_broken_pool(executor)
+        raise
+
+def map_in_pool(fn, jobs, window):
+    """Blocking batch form of run_in_pool: yield fn(*job) in job order, at most
+    `window` jobs queued or running. On exit, queued jobs are cancelled and
+    running ones are waited for, so an analysis slot held around this covers
+    all of its pool work"""
+    executor = get_analysis_executor()
+    pending = deque()
+    try:
+        for job in jobs:
+            pending.append(executor.submit(fn, *job))
+            while len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    except BrokenProcessPool:
+        discard_broken_pool(executor)
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+        wait(pending)
+
+def analysis_job(file_path, chart_type, render=True, dataset_hash=None):
+    """Worker side: parse once, summarize and optionally render; returns (analysis, PNG, ingest, render)"""
+    df, ingest = load_csv(file_path, dataset_hash)
+    analysis = analyze_data(describe_frame(df))
+    png, render_info = render_chart(df, chart_type) if render else (None, None)
+    return analysis, png, ingest, render_info
 
 class DataFetcher(AssistantAgent):
     def __init__(self, name):
@@ -83,10 +793,8 @@ class DataAnalyst(AssistantAgent):
             system_message="Expert data analyst."
         )
 
-async def run_analysis_pipeline(file_path, chart_type):
-    unique_id = str(uuid.uuid4())
-    img_path = os.path.join(app.config['STATIC_FOLDER'], f'plot_{unique_id}.png')
-    
+def build_agents():
+    """Create the fetcher/analyst group chat with its LLM clients"""
     fetcher = DataFetcher(name="Data_Fetcher")
     analyst = DataAnalyst(name="Data_Analyst")
     user_proxy = UserProxyAgent(name="User_Proxy", human_input_mode="NEVER")
@@ -97,16 +805,100 @@ async def run_analysis_pipeline(file_path, chart_type):
         speaker_selection_method="round_robin"
     )
     manager = GroupChatManager(groupchat=groupchat, llm_config={"config_list": config_list})
+    return user_proxy, groupchat, manager
+
+class AgentFactory:
+    """Hands out pooled agent sets, reset between requests, so config parsing and
+    LLM client construction happen once per agent set instead of once per request"""
+    def __init__(self, builder, max_idle=AGENT_POOL_SIZE):
+        self.builder = builder
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()  # Flask runs each async view in its own thread
+        self.stats = {"built": 0, "reused": 0, "build_seconds": 0.0}
+
+    def acquire(self):
+        with self._lock:
+            agents = self._idle.pop() if self._idle else None
+            if agents is not None:
+                self.stats["reused"] += 1
+        if agents is None:
+            start = time.perf_counter()
+            agents = self.builder()
+            with self._lock:
+                self.stats["built"] += 1
+                self.stats["build_seconds"] += time.perf_counter() - start
+        return agents
+
+    def release(self, agents, healthy=True):
+        """Reset an agent set's conversation state and return it to the pool"""
+        if not healthy:
+            return
+        user_proxy, groupchat, manager = agents
+        for agent in [*groupchat.agents, manager]:
+            agent.reset()
+        groupchat.reset()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(agents)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats, idle=len(self._idle))
+        avg = stats["build_seconds"] / stats["built"] if stats["built"] else 0.0
+        stats["avg_build_seconds"] = avg
+        stats["build_seconds_avoided"] = stats["reused"] * avg
+        return stats
+
+agent_factory = AgentFactory(build_agents)
+
+async def run_agent_chat(file_path):
+    agents = agent_factory.acquire()
+    healthy = False
+    try:
+        user_proxy, groupchat, manager = agents
+        await user_proxy.a_initiate_chat(
+            manager,
+            message=f"Analyze this CSV file: {file_path}"
+        )
+        healthy = True
+    finally:
+        agent_factory.release(agents, healthy)
+
+async def run_analysis_pipeline(file_path, chart_type):
+    # The conversation is network wait on Gemini: it starts first, runs alongside
+    # the pool work and takes no analysis slot
+    chat = asyncio.create_task(run_agent_chat(file_path))
+    try:
+        # Same data and chart type render the same PNG, so reuse it
+        dataset_hash = await asyncio.to_thread(file_digest, file_path)
+        key = chart_cache_key(dataset_hash, chart_type)
+        plot_name = artifact_store.lookup(key)
+        png = render = None
+
+        with analysis_slot():
+            if is_large_upload(file_path):
+                # Blocks are parsed across the pool; only the merged summary and sample come back
+                summary, sample, ingest = await asyncio.to_thread(streaming_describe, file_path)
+                analysis_result = analyze_data(summary)
+                if plot_name is None:
+                    png, render = await run_in_pool(render_chart, sample, chart_type)
+            else:
+                # Parsed once in a worker; analysis and plotting share the same frame
+                analysis_result, png, ingest, render = await run_in_pool(
+                    analysis_job, file_path, chart_type, plot_name is None, dataset_hash
+                )
+        await chat
+    except BaseException:
+        chat.cancel()
+        await asyncio.gather(chat, return_exceptions=True)
+        raise
+    record_ingest(ingest)
+    if png is not None:
+        plot_name = artifact_store.put(png, key)
+    record_render(render or {"cached": plot_name is not None, "seconds": 0.0})
     
-    await user_proxy.a_initiate_chat(
-        manager,
-        message=f"Analyze this CSV file: {file_path}"
-    )
-    
-    analysis_result = await analyze_data(file_path)
-    visualization_path = await generate_visualization(file_path, img_path, chart_type)
-    
-    return analysis_result, visualization_path
+    return analysis_result, plot_name, ingest
 
 @app.route('/')
 def index():
@@ -125,16 +917,20 @@ async def analyze():
     
     if file and file.filename.endswith('.csv'):
         filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        # Unique per request: concurrent uploads of the same file name must not collide
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}_{filename}")
         
         try:
-            analysis_result, viz_path = await run_analysis_pipeline(file_path, chart_type)
-            plot_filename = os.path.basename(viz_path) if viz_path else None
+            file.save(file_path)
+            analysis_result, plot_filename, ingest = await run_analysis_pipeline(file_path, chart_type)
             
             return render_template('results.html', 
                                 analysis=analysis_result,
-                                plot_url=plot_filename)
+                                plot_url=plot_filename,
+                                ingest=ingest)
+        except AnalysisBusy:
+            # Shed load rather than queueing pool work without bound
+            return "Server busy: too many analyses in progress, please retry shortly", 503, {"Retry-After": "5"}
         except Exception as e:
             return f"Analysis Error: {str(e)}", 500
         finally:
@@ -145,7 +941,32 @@ async def analyze():
 
 @app.route('/static/<filename>')
 def serve_static(filename):
-    return send_from_directory(app.config['STATIC_FOLDER'], filename)
+    match = ARTIFACT_NAME.match(filename)
+    if match is None:
+        return send_from_directory(app.config['STATIC_FOLDER'], filename)
+    # Content-addressed: the name is the ETag and the bytes never change
+    artifact_store.touch(filename)
+    response = send_from_directory(app.config['STATIC_FOLDER'], filename,
+                                   etag=match.group(1), max_age=ARTIFACT_TTL)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/metrics')
+def metrics():
+    with ingest_lock:
+        ingest = dict(ingest_metrics)
+    with render_lock:
+        render = dict(render_metrics)
+    with executor_lock:
+        pool = dict(pool_metrics)
+    return jsonify({"agents": agent_factory.snapshot(), "ingest": ingest, "render": render,
+                    "pool": pool, "artifacts": artifact_store.snapshot(),
+                    "columnar_cache": columnar_cache.snapshot()})
 
 if __name__ == '__main__':
+    # Start and warm the analysis workers before the first upload arrives
+    for _ in range(ANALYSIS_WORKERS):
+        get_analysis_executor().submit(int)
+    artifact_store.start_sweeper()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -2,15 +2,24 @@ import os
 import chromadb
 from chromadb.utils import embedding_functions
 import google.generativeai as genai
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template
 import asyncio
-import nest_asyncio
+import contextlib
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
 from dotenv import load_dotenv
+import numpy as np
 import tiktoken
 
-# Initialize environment and async support
+# Initialize environment
 load_dotenv()
-nest_asyncio.apply()
 
 app = Flask(__name__)
 
@@ -18,70 +27,437 @@ app = Flask(__name__)
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 # Initialize ChromaDB with default embeddings
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_db")
 default_ef = embedding_functions.DefaultEmbeddingFunction()
 
+# Embedding Cache Configuration
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "embedding_cache.sqlite3")
+)
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "4096"))
+SQLITE_MAX_PARAMS = 500  # Keys per IN (...) lookup
+
+def embedding_model_name(embedding_function) -> str:
+    """Identifies the model so vectors from different models never share a key"""
+    cls = type(embedding_function)
+    return f"{cls.__module__}.{cls.__qualname__}:{getattr(embedding_function, 'MODEL_NAME', '')}"
+
+class CachedEmbeddingFunction(embedding_functions.EmbeddingFunction):
+    """Persistent embedding cache: in-memory LRU over a size-bounded sqlite store.
+
+    Vectors are keyed by a hash of model and text and kept as float32 bytes.
+    Calls through the collection count as documents; embed_queries counts queries.
+    """
+    def __init__(self, embedding_function, path=EMBEDDING_CACHE_PATH,
+                 max_bytes=EMBEDDING_CACHE_MAX_BYTES, memory_entries=EMBEDDING_CACHE_MEMORY_ENTRIES):
+        self.embedding_function = embedding_function
+        self.model = embedding_model_name(embedding_function)
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB, last_access REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings (last_access)")
+        self._db.commit()
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+        self._stats = {kind: {"hits": 0, "misses": 0} for kind in ("documents", "queries")}
+        self._evictions = 0
+
+    def __call__(self, input):
+        return self.embed(input, "documents")
+
+    def embed_queries(self, texts):
+        return self.embed(texts, "queries")
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def embed(self, texts, kind="documents"):
+        keys = [self.key(text) for text in texts]
+        found = self._lookup(set(keys))
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            # Compute outside the lock so pool threads embed concurrently
+            vectors = self.embedding_function(list(missing.values()))
+            computed = {key: np.asarray(vector, dtype=np.float32).tobytes()
+                        for key, vector in zip(missing, vectors)}
+            self._store(computed)
+            found.update(computed)
+        with self._lock:
+            self._stats[kind]["hits"] += len(keys) - len(missing)
+            self._stats[kind]["misses"] += len(missing)
+        return [np.frombuffer(found[key], dtype=np.float32).tolist() for key in keys]
+
+    def _lookup(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            remaining = [key for key in keys if key not in found]
+            for i in range(0, len(remaining), SQLITE_MAX_PARAMS):
+                batch = remaining[i:i + SQLITE_MAX_PARAMS]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = vector
+                    self._remember(key, vector)
+            if len(found) > len(keys) - len(remaining):
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in remaining if key in found]
+                )
+                self._db.commit()
+        return found
+
+    def _store(self, vectors):
+        now = time.time()
+        with self._lock:
+            added = 0
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                    (key, vector, now)
+                )
+                added += len(vector) * cursor.rowcount
+            self._bytes += added
+            self._evict()
+            self._db.commit()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        while self._bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._db.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                self._bytes -= size
+                self._evictions += 1
+                if self._bytes <= self.max_bytes:
+                    break
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            by_kind = {}
+            for kind, counters in self._stats.items():
+                lookups = counters["hits"] + counters["misses"]
+                by_kind[kind] = dict(counters, hit_rate=counters["hits"] / lookups if lookups else 0.0)
+            return {
+                "model": self.model,
+                "entries": entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "memory_entries": len(self._memory),
+                "evictions": self._evictions,
+                "by_kind": by_kind,
+            }
+
+embedding_cache = CachedEmbeddingFunction(default_ef)
+
+# Answer generation: a shared event loop awaits Gemini for every server thread
+MAX_CONCURRENT_GENERATIONS = int(os.getenv("MAX_CONCURRENT_GENERATIONS", "16"))
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "4"))
+ANSWER_TIMEOUT = float(os.getenv("ANSWER_TIMEOUT", "120"))  # Seconds without progress
+NO_RESULTS_ANSWER = "No relevant information found in the documents."
+ERROR_ANSWER = "I encountered an error processing your question."
+# Other processes (ingest.py) write to the same store, so the cached chunk count is
+# re-read from Chroma once it is this old, or whenever it is 0
+COUNT_REFRESH_SECONDS = float(os.getenv("COUNT_REFRESH_SECONDS", "30"))
+
+# Answer Cache Configuration
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))  # Seconds
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2048"))
+
+def normalize_question(question: str) -> str:
+    """Case, spacing and trailing punctuation do not change what is being asked"""
+    return " ".join(question.lower().split()).rstrip("?!. ")
+
+class AnswerCache:
+    """Generated answers keyed on the normalized question and the retrieved chunk IDs.
+
+    Chunk IDs are content hashes, so an answer is only reused while retrieval returns
+    the same context; documents added nearby change the IDs and with them the key.
+    """
+    def __init__(self, ttl=ANSWER_CACHE_TTL, max_entries=ANSWER_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (answer, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+
+    def key(self, model: str, question: str, chunk_ids) -> str:
+        parts = [model, normalize_question(question), *chunk_ids]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key: str, answer: str):
+        with self._lock:
+            self._entries[key] = (answer, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(
+                self._stats,
+                entries=len(self._entries),
+                max_entries=self.max_entries,
+                ttl=self.ttl,
+                hit_rate=self._stats["hits"] / lookups if lookups else 0.0
+            )
+
+answer_cache = AnswerCache()
+
+# Bulk ingestion tuning
+CHUNK_TOKENS = 500
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "0"))  # Tokens shared by consecutive chunks
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))  # Chunks per embedding call
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", str(min(8, os.cpu_count() or 1))))
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "4096"))  # Chunks per collection.add
+
+@lru_cache(maxsize=None)
+def get_encoding(name="cl100k_base"):
+    """tiktoken encodings are costly to build; load each one once per process"""
+    return tiktoken.get_encoding(name)
+
+def iter_chunks(text, max_tokens=CHUNK_TOKENS, overlap=0):
+    """Yield token windows of text, each sharing `overlap` tokens with the previous one"""
+    if not 0 <= overlap < max_tokens:
+        raise ValueError("overlap must be between 0 and max_tokens - 1")
+    encoding = get_encoding()
+    tokens = encoding.encode_ordinary(text)
+    step = max_tokens - overlap
+    for i in range(0, len(tokens), step):
+        yield encoding.decode(tokens[i:i + max_tokens])
+        if i + max_tokens >= len(tokens):
+            break
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def chunk_id(chunk: str) -> str:
+    """Content-addressed chunk ID: no collection scan to allocate, and repeats map to one entry"""
+    return "chunk-" + hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:32]
+
 class DocumentSystem:
-    def __init__(self):
+    def __init__(self, path=CHROMA_PATH, embedding_function=default_ef, answer_cache=None):
         # Persistent ChromaDB client
-        self.client = chromadb.PersistentClient(path="./chroma_db")
+        self.client = chromadb.PersistentClient(path=path)
+        self.embedding_function = embedding_function
         self.collection = self.client.get_or_create_collection(
             name="documents",
-            embedding_function=default_ef
+            embedding_function=embedding_function
         )
         self.model = genai.GenerativeModel('gemini-2.0-flash-001')
-        self.loop = asyncio.new_event_loop()
-        
-    def chunk_text(self, text, max_tokens=500):
+        self.answer_cache = answer_cache
+        # One loop on its own thread serves every request thread; retrieval is blocking
+        # Chroma work, so it runs on a small pool instead of the loop
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._retrieval_pool = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieve")
+        self._generations = asyncio.Semaphore(MAX_CONCURRENT_GENERATIONS)
+        self.generation_stats = {"in_flight": 0, "waiting": 0, "completed": 0, "streamed": 0,
+                                 "cancelled": 0, "errors": 0}
+        # Chunk count cached for query sizing, since Chroma counts by scanning the
+        # table; add_document keeps it current and it is re-read when stale or 0
+        self._count_lock = threading.Lock()
+        self._add_lock = threading.Lock()
+        self._refresh_count()
+
+    @property
+    def loop(self):
+        """The answer loop, started on the first question; ingestion never needs it"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="answer-loop", daemon=True).start()
+            return self._loop
+
+    @property
+    def count(self):
+        with self._count_lock:
+            count, counted_at = self._count, self._counted_at
+        if count == 0 or time.monotonic() - counted_at >= COUNT_REFRESH_SECONDS:
+            return self._refresh_count()
+        return count
+
+    def _refresh_count(self):
+        count = self.collection.count()
+        with self._count_lock:
+            self._count, self._counted_at = count, time.monotonic()
+        return count
+
+    def chunk_text(self, text, max_tokens=CHUNK_TOKENS, overlap=0):
         """Split text into manageable chunks"""
-        encoding = tiktoken.get_encoding("cl100k_base")
-        tokens = encoding.encode(text)
-        chunks = []
-        
-        for i in range(0, len(tokens), max_tokens):
-            chunk = tokens[i:i + max_tokens]
-            chunks.append(encoding.decode(chunk))
-        
-        return chunks
+        return list(iter_chunks(text, max_tokens, overlap))
+
+    def _missing(self, ids):
+        """IDs not yet in the collection; the lookup is by primary key"""
+        existing = set(self.collection.get(ids=ids, include=[])['ids'])
+        return [i for i in ids if i not in existing]
+
+    def _store(self, ids, documents, embeddings=None):
+        """Add chunks that are not stored yet and return how many were new"""
+        with self._add_lock:
+            rows = dict(zip(ids, zip(documents, embeddings or [None] * len(ids))))
+            new_ids = self._missing(list(rows))
+            if new_ids:
+                # Store the chunks
+                self.collection.add(
+                    ids=new_ids,
+                    documents=[rows[i][0] for i in new_ids],
+                    embeddings=[rows[i][1] for i in new_ids] if embeddings else None
+                )
+                with self._count_lock:
+                    self._count += len(new_ids)
+            return len(new_ids)
 
     def add_document(self, text: str):
         """Add a document to the collection"""
         try:
-            chunks = self.chunk_text(text)
-            
-            # Generate IDs for each chunk
-            existing_ids = self.collection.get()['ids']
-            new_ids = [f"doc{len(existing_ids) + i + 1}" for i in range(len(chunks))]
-            
-            # Store the chunks
-            self.collection.add(
-                documents=chunks,
-                ids=new_ids
-            )
+            # Repeated chunks within the document collapse to one ID
+            chunks = {chunk_id(chunk): chunk for chunk in dict.fromkeys(self.chunk_text(text))}
+            self._store(list(chunks), list(chunks.values()))
             return True
         except Exception as e:
             print(f"Error adding document: {str(e)}")
             return False
 
-    async def _get_answer(self, question: str):
-        """Internal async method to get answer"""
-        try:
-            # Retrieve relevant document chunks
-            results = self.collection.query(
-                query_texts=[question],
-                n_results=min(5, len(self.collection.get()['ids']))
-            )
-            
-            if not results['documents']:
-                return "No relevant information found in the documents."
-                
-            context = "\n\n".join([
-                f"Document excerpt {i+1}:\n{chunk}" 
-                for i, chunk in enumerate(results['documents'][0])
-            ])
-            
-            # Generate answer using Gemini
-            response = await self.model.generate_content_async(
-                f"""Analyze the following document excerpts and provide a comprehensive answer to the question.
+    def add_documents(self, texts, overlap=CHUNK_OVERLAP, progress=None):
+        """Bulk ingestion: stream texts through chunking, pooled batch embedding and batched writes.
+
+        `texts` may be any iterable, including a generator over files. `progress` is
+        called with the running stats after each write.
+        """
+        stats = {"documents": 0, "chunks": 0, "added": 0, "skipped": 0, "seconds": 0.0, "chunks_per_second": 0.0}
+        write_size = min(WRITE_BATCH_SIZE, self.client.max_batch_size)
+        start = time.perf_counter()
+        seen = set()
+        writes = {"ids": [], "documents": [], "embeddings": []}
+
+        def chunks():
+            for text in texts:
+                stats["documents"] += 1
+                for chunk in iter_chunks(text, overlap=overlap):
+                    stats["chunks"] += 1
+                    key = chunk_id(chunk)
+                    if key in seen:
+                        stats["skipped"] += 1
+                        continue
+                    seen.add(key)
+                    yield key, chunk
+
+        def wait_for_write():
+            if pending_write:
+                stats["added"] += pending_write.pop().result()
+                stats["seconds"] = time.perf_counter() - start
+                stats["chunks_per_second"] = stats["chunks"] / stats["seconds"]
+                if progress:
+                    progress(dict(stats))
+
+        def flush(limit):
+            # One write in flight: Chroma's per-record bookkeeping overlaps with embedding
+            if len(writes["ids"]) < limit or not writes["ids"]:
+                return
+            wait_for_write()
+            pending_write.append(writer.submit(self._store, *(list(column) for column in writes.values())))
+            for column in writes.values():
+                column.clear()
+
+        def collect(in_flight, limit):
+            while len(in_flight) > limit:
+                ids, documents, future = in_flight.popleft()
+                writes["ids"] += ids
+                writes["documents"] += documents
+                writes["embeddings"] += future.result()
+                flush(write_size)
+
+        # Keep a bounded number of embedding batches in flight on the pool
+        in_flight, pending_write = deque(), []
+        with ThreadPoolExecutor(max_workers=EMBED_WORKERS, thread_name_prefix="embed") as pool, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix="write") as writer:
+            for batch in batched(chunks(), EMBED_BATCH_SIZE):
+                ids = self._missing([key for key, _ in batch])
+                stats["skipped"] += len(batch) - len(ids)
+                if not ids:
+                    continue
+                wanted = set(ids)
+                documents = [chunk for key, chunk in batch if key in wanted]
+                in_flight.append((ids, documents, pool.submit(self.embedding_function, documents)))
+                collect(in_flight, 2 * EMBED_WORKERS)
+            collect(in_flight, 0)
+            flush(1)
+            wait_for_write()
+        stats["seconds"] = time.perf_counter() - start
+        stats["chunks_per_second"] = stats["chunks"] / stats["seconds"] if stats["seconds"] else 0.0
+        print(f"Ingested {stats['documents']} documents: {stats['added']} new chunks, "
+              f"{stats['skipped']} duplicates, {stats['chunks_per_second']:.0f} chunks/s")
+        return stats
+
+    def retrieve(self, question: str, n_results=5):
+        """IDs and text of the nearest chunks for a question, sized from the cached count"""
+        n_results = min(n_results, self.count)
+        if n_results == 0:
+            return [], []
+        # Embedded here rather than via query_texts so cached vectors count as query hits
+        embed = getattr(self.embedding_function, "embed_queries", self.embedding_function)
+        results = self.collection.query(
+            query_embeddings=embed([question]),
+            n_results=n_results
+        )
+        if not results['documents']:
+            return [], []
+        return results['ids'][0], results['documents'][0]
+
+    def build_prompt(self, question: str, chunks):
+        context = "\n\n".join([
+            f"Document excerpt {i+1}:\n{chunk}" 
+            for i, chunk in enumerate(chunks)
+        ])
+        return f"""Analyze the following document excerpts and provide a comprehensive answer to the question.
                 If the answer cannot be determined from the context, say "I don't know based on the provided documents."
                 
                 Question: {question}
@@ -90,18 +466,139 @@ class DocumentSystem:
                 {context}
                 
                 Comprehensive answer:"""
-            )
+
+    @contextlib.asynccontextmanager
+    async def _generation_slot(self):
+        """Caps concurrent Gemini calls at MAX_CONCURRENT_GENERATIONS; runs on the shared loop"""
+        stats = self.generation_stats
+        stats["waiting"] += 1
+        try:
+            await self._generations.acquire()
+        finally:
+            stats["waiting"] -= 1
+        stats["in_flight"] += 1
+        try:
+            yield
+            stats["completed"] += 1
+        except asyncio.CancelledError:
+            stats["cancelled"] += 1  # Client went away mid-stream
+            raise
+        except BaseException:
+            stats["errors"] += 1
+            raise
+        finally:
+            stats["in_flight"] -= 1
+            self._generations.release()
+
+    async def _retrieve_async(self, question: str):
+        return await self.loop.run_in_executor(self._retrieval_pool, self.retrieve, question)
+
+    def _answer_key(self, question: str, chunk_ids):
+        if self.answer_cache is None:
+            return None
+        model = getattr(self.model, "model_name", "")
+        return self.answer_cache.key(model, question, chunk_ids)
+
+    async def _get_answer(self, question: str):
+        """Internal async method to get answer"""
+        try:
+            # Retrieve relevant document chunks
+            chunk_ids, chunks = await self._retrieve_async(question)
+            
+            if not chunks:
+                return NO_RESULTS_ANSWER
+
+            # Reuse the answer while retrieval still returns the same context
+            key = self._answer_key(question, chunk_ids)
+            cached = self.answer_cache.get(key) if key else None
+            if cached is not None:
+                return cached
+            
+            # Generate answer using Gemini
+            async with self._generation_slot():
+                response = await self.model.generate_content_async(self.build_prompt(question, chunks))
+            if key and response.text:
+                self.answer_cache.put(key, response.text)
             return response.text
         except Exception as e:
             print(f"Error getting answer: {str(e)}")
-            return "I encountered an error processing your question."
+            return ERROR_ANSWER
+
+    async def _stream_answer(self, question: str):
+        """Answer text pieces as Gemini produces them"""
+        chunk_ids, chunks = await self._retrieve_async(question)
+        if not chunks:
+            yield NO_RESULTS_ANSWER
+            return
+        key = self._answer_key(question, chunk_ids)
+        cached = self.answer_cache.get(key) if key else None
+        if cached is not None:
+            yield cached
+            return
+        pieces = []
+        async with self._generation_slot():
+            self.generation_stats["streamed"] += 1
+            response = await self.model.generate_content_async(self.build_prompt(question, chunks), stream=True)
+            async for piece in response:
+                if piece.text:
+                    pieces.append(piece.text)
+                    yield piece.text
+        # Only complete answers are cached; a cancelled stream never reaches this point
+        if key and pieces:
+            self.answer_cache.put(key, "".join(pieces))
 
     def get_answer(self, question: str):
-        """Synchronous wrapper for async answer generation"""
-        return self.loop.run_until_complete(self._get_answer(question))
+        """Blocking wrapper for server threads; the work runs on the shared loop"""
+        future = asyncio.run_coroutine_threadsafe(self._get_answer(question), self.loop)
+        try:
+            return future.result(ANSWER_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            print(f"Error getting answer: no result after {ANSWER_TIMEOUT}s")
+            return ERROR_ANSWER
+
+    def stream_answer(self, question: str):
+        """Yield (event, data) pairs: "token" pieces, then "done" or "error".
 
-# Initialize document system
-doc_system = DocumentSystem()
+        Closing the generator (e.g. the client disconnected) cancels the generation.
+        """
+        events = queue.Queue()
+
+        async def pump():
+            try:
+                async for piece in self._stream_answer(question):
+                    events.put(("token", {"text": piece}))
+                events.put(("done", {}))
+            except Exception as e:
+                print(f"Error streaming answer: {str(e)}")
+                events.put(("error", {"error": ERROR_ANSWER}))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                try:
+                    event, data = events.get(timeout=ANSWER_TIMEOUT)
+                except queue.Empty:
+                    print(f"Error streaming answer: no progress after {ANSWER_TIMEOUT}s")
+                    yield "error", {"error": ERROR_ANSWER}
+                    return
+                yield event, data
+                if event != "token":
+                    return
+        finally:
+            future.cancel()
+
+# Document system, opened on first use so that importing this module (as ingest.py
+# does) opens no store at CHROMA_PATH
+_doc_system = None
+_doc_system_lock = threading.Lock()
+
+def get_doc_system():
+    global _doc_system
+    with _doc_system_lock:
+        if _doc_system is None:
+            _doc_system = DocumentSystem(embedding_function=embedding_cache, answer_cache=answer_cache)
+        return _doc_system
 
 @app.route('/')
 def home():
@@ -114,19 +611,64 @@ def add_document():
     if not text:
         return jsonify({'success': False, 'error': 'Text is required'})
     
-    if doc_system.add_document(text):
+    if get_doc_system().add_document(text):
         return jsonify({'success': True})
     else:
         return jsonify({'success': False, 'error': 'Failed to add document'})
 
+@app.route('/add_bulk', methods=['POST'])
+def add_documents():
+    """Bulk ingestion: a JSON body {"documents": [...]} or uploaded text files"""
+    if request.is_json:
+        texts = [t for t in request.json.get('documents', []) if isinstance(t, str) and t.strip()]
+    else:
+        texts = [f.read().decode('utf-8', errors='replace') for f in request.files.getlist('files')]
+    if not texts:
+        return jsonify({'success': False, 'error': 'Documents are required'}), 400
+
+    try:
+        return jsonify({'success': True, 'stats': get_doc_system().add_documents(texts)})
+    except Exception as e:
+        print(f"Error adding documents: {str(e)}")
+        return jsonify({'success': False, 'error': 'Failed to add documents'}), 500
+
+@app.route('/metrics')
+def metrics():
+    doc_system = get_doc_system()
+    return jsonify({
+        'chunks': doc_system.count,
+        'generations': dict(doc_system.generation_stats, limit=MAX_CONCURRENT_GENERATIONS),
+        'embedding_cache': embedding_cache.stats(),
+        'answer_cache': answer_cache.stats()
+    })
+
 @app.route('/ask', methods=['POST'])
 def ask():
     question = request.json.get('question', '').strip()
     if not question:
         return jsonify({'error': 'Question is required'}), 400
     
-    answer = doc_system.get_answer(question)
+    answer = get_doc_system().get_answer(question)
     return jsonify({'answer': answer})
 
+@app.route('/ask/stream', methods=['POST'])
+def ask_stream():
+    """NDJSON version of /ask: {"event": "token", "text": ...} lines, then a "done" or "error" line"""
+    question = request.json.get('question', '').strip()
+    if not question:
+        return jsonify({'error': 'Question is required'}), 400
+
+    doc_system = get_doc_system()
+
+    def generate():
+        for event, data in doc_system.stream_answer(question):
+            yield ndjson(event, data)
+
+    return Response(generate(), mimetype="application/x-ndjson",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def ndjson(event, data):
+    return json.dumps({"event": event, **data}) + "\n"
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
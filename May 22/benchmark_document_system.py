@@ -0,0 +1,74 @@
+"""Add and query latency as the collection grows: legacy full-collection scans vs count().
+
+Embeddings come from a hash-based stub, so timings reflect Chroma bookkeeping rather
+than the embedding model. Each level is seeded in bulk into a throwaway directory.
+
+Usage: python benchmark_document_system.py [--sizes 1000 10000 100000] [--samples 20]
+       python benchmark_document_system.py --sizes 1000000  # Slow to seed; needs several GB
+"""
+import argparse
+import hashlib
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "stub")
+
+import numpy as np  # noqa: E402
+from chromadb import EmbeddingFunction  # noqa: E402
+
+from app import DocumentSystem  # noqa: E402
+
+DIMENSIONS = 384  # Same width as the default all-MiniLM-L6-v2 embeddings
+SEED_BATCH = 5000
+
+
+class HashEmbeddingFunction(EmbeddingFunction):
+    """Deterministic pseudo-random unit vectors derived from the text"""
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(DIMENSIONS)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
+
+
+def seed(system, size):
+    for start in range(system.collection.count(), size, SEED_BATCH):
+        stop = min(start + SEED_BATCH, size)
+        chunks = [f"seed chunk {i} about topic {i % 997}" for i in range(start, stop)]
+        system.collection.add(documents=chunks, ids=[f"seed{i}" for i in range(start, stop)])
+    system._refresh_count()
+
+
+def median_ms(fn, samples):
+    timings = []
+    for i in range(samples):
+        start = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(args):
+    with tempfile.TemporaryDirectory(prefix="chroma_bench_", ignore_cleanup_errors=True) as directory:
+        system = DocumentSystem(path=directory, embedding_function=HashEmbeddingFunction())
+        for size in sorted(args.sizes):
+            seed(system, size)
+            collection = system.collection
+            legacy_count = median_ms(lambda i: len(collection.get()['ids']), args.legacy_samples)
+            count = median_ms(lambda i: collection.count(), args.samples)
+            add = median_ms(lambda i: system.add_document(f"new document {size}-{i} " * 20), args.samples)
+            query = median_ms(lambda i: system.retrieve(f"topic {i}"), args.samples)
+            print(f"chunks={system.count:>8} legacy get()={legacy_count:9.2f}ms count()={count:6.2f}ms "
+                  f"add_document={add:6.2f}ms retrieve={query:6.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--legacy-samples", type=int, default=3, help="full scans are slow at large sizes")
+    main(parser.parse_args())
@@ -0,0 +1,61 @@
+"""Bulk-load text files into the document store through DocumentSystem.add_documents.
+
+Files are read lazily, chunked, embedded in batches across a thread pool and
+written in large batches. Chunks that are already stored are skipped, and
+vectors come from the persistent embedding cache when the text was seen
+before, so an interrupted run can simply be started again.
+
+Usage: python ingest.py PATH [PATH ...] [--pattern "*.txt"] [--overlap 50] [--db ./chroma_db]
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("GEMINI_API_KEY", "unused")  # Ingestion never calls Gemini
+
+from app import CHROMA_PATH, CHUNK_OVERLAP, DocumentSystem, embedding_cache  # noqa: E402
+
+
+def iter_files(paths, pattern):
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob(pattern) if p.is_file())
+        else:
+            yield path
+
+
+def iter_texts(files):
+    for path in files:
+        text = path.read_text(encoding="utf-8", errors="replace")
+        if text.strip():
+            yield text
+
+
+def report(stats):
+    print(f"\r{stats['documents']:>9} documents {stats['chunks']:>10} chunks "
+          f"{stats['added']:>10} new {stats['chunks_per_second']:8.0f} chunks/s",
+          end="", file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="text files or directories to search")
+    parser.add_argument("--pattern", default="*.txt", help="file glob used inside directories")
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP, help="tokens shared by consecutive chunks")
+    parser.add_argument("--db", default=CHROMA_PATH, help="Chroma persistence directory")
+    args = parser.parse_args()
+
+    system = DocumentSystem(path=args.db, embedding_function=embedding_cache)
+    stats = system.add_documents(iter_texts(iter_files(args.paths, args.pattern)),
+                                 overlap=args.overlap, progress=report)
+    print(file=sys.stderr)
+    print(f"{stats['documents']} documents, {stats['chunks']} chunks ({stats['added']} new, "
+          f"{stats['skipped']} already stored) in {stats['seconds']:.1f}s, "
+          f"{stats['chunks_per_second']:.0f} chunks/s; collection holds {system.count}")
+    cache = embedding_cache.stats()["by_kind"]["documents"]
+    print(f"embedding cache: {cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate']:.0%})")
+
+
+if __name__ == "__main__":
+    main()